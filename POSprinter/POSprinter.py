@@ -7,25 +7,73 @@
 # 
 
 """version 1.1 - a POSprinter module for Python"""
+import contextlib
+import time
+
+# Characters used for lines printed with the printer font (code page PC437)
+RULE_CHARS = { "solid": "\xC4", "double": "\xCD", "dashed": "-", "dotted": "\xFA" }
+# Start or end the definition of a macro (see POSprinter.sendCopies)
+MACRO = "\x1D\x3A"
+# Printer commands of lines printed by POSprinter.printLine
+_lineCache = {}
+# Printer commands of static receipt parts printed by POSprinter.printStatic
+_fragmentCache = {}
+# Truetype fonts loaded by printFontText: { (fontFile, textSize): font }
+_fontCache = {}
+
+def loadFont(fontFile, textSize):
+    """A truetype font, loaded once per file and size"""
+    font = _fontCache.get((fontFile, textSize))
+    if font is None:
+        from PIL import ImageFont
+        font = _fontCache[(fontFile, textSize)] = ImageFont.truetype(fontFile, textSize)
+    return font
+
 class POSprinter:
     """This module prints text, images etc. for serial connected label printers (POS printer)"""
     def __init__(self, port="/dev/ttyUSB0", baudrate=9600, bytesize=8, 
-        parity='N', stopbits=1, charWidth=44, pxWidth=284):
-        """Set up serial port. Set width of of the printer/paper in number of characters and pixels."""
-        # Multiple inheritance may become a nightmare, so we are importing the modules insted.
-        try:
-            import serial
-        except:
-            raise 
+        parity='N', stopbits=1, charWidth=None, pxWidth=None, transport=None, rtscts=False, xonxoff=False,
+        profile=None):
+        """Set up serial port. Set width of of the printer/paper in number of characters and pixels.
+        rtscts and xonxoff turn on hardware (RTS/CTS) or software (XON/XOFF) flow control.
+        If transport is set (any object with a write and a close method, e.g. from POSprinter.transport)
+        it is used instead of the serial port.
+        profile is the name of the printer model (e.g. "tm-t88iii") or a Profile object (see POSprinter.profiles).
+        The width, image encoding, cut command etc. are taken from the profile unless given explicitly."""
+        from .profiles import getProfile, DEFAULT
+        self.profile = getProfile(profile or DEFAULT)
+        if self.profile.maxBaudrate and baudrate > self.profile.maxBaudrate:
+            raise ValueError("The %s printer supports at most %d baud" % (self.profile.name, self.profile.maxBaudrate))
+        self.portSettings = dict(port=port, baudrate=baudrate, bytesize=bytesize, parity=parity,
+            stopbits=stopbits, rtscts=rtscts, xonxoff=xonxoff)
+        if transport is not None:
+            self.printer = transport
         else:
-            # Set up serial port
+            # Multiple inheritance may become a nightmare, so we are importing the modules insted.
             try:
-                self.printer = serial.Serial(port, baudrate, bytesize, parity, stopbits)
+                import serial
             except:
-                raise
+                raise 
+            else:
+                # Set up serial port
+                try:
+                    self.printer = serial.Serial(port, baudrate, bytesize, parity, stopbits, xonxoff=xonxoff, rtscts=rtscts)
+                except:
+                    raise
         # Assign other values
-        self.width = charWidth
-        self.pxWidth = pxWidth
+        self.width = charWidth or self.profile.charWidth
+        self.pxWidth = pxWidth or self.profile.pxWidth
+        # Horizontal and vertical motion units (ESC $, ESC J) of the printer in units per inch
+        self.motionUnits = self.profile.motionUnits
+        # Encoding of images (see iterImgBands)
+        self.compactImages = self.profile.compactImages
+        self.rasterImages = self.profile.rasterImages
+        # Set to a metrics.Metrics object to time the stages of printing
+        self.metrics = None
+        # Depth of redirect() to transports that compile output instead of sending it
+        self._compiling = 0
+        # cost.CostModel used by estimate()
+        self.costModel = None
 
     def write(self, string, rcolStr=None, align="left"):
         """Write simple text string. Remember \n for newline where applicable.
@@ -40,7 +88,7 @@ class POSprinter:
                 
         if not rcolStr:
             try:
-                self.printer.write(string)
+                self._transmit(string)
             except:
                 raise
         else:
@@ -57,10 +105,82 @@ class POSprinter:
                 numOfBlanks = self.width - lastLineLen
                 string += " " * numOfBlanks
             try:
-                self.printer.write(string + rcolStr)
+                self._transmit(string + rcolStr)
             except:
                 raise
 
+    def _transmit(self, data):
+        """Send data to the printer (or transport). Output compiled within redirect() is recorded as the stage
+        "compile", so a job compiled and then sent is only counted once as "transmit"."""
+        if self.metrics is None:
+            self.printer.write(data)
+        else:
+            start = time.time()
+            self.printer.write(data)
+            self.metrics.record("compile" if self._compiling else "transmit", time.time() - start, len(data))
+
+    def _startStage(self):
+        """The start time of a stage if metrics are recorded"""
+        if self.metrics is None:
+            return None
+        return time.time()
+
+    def _endStage(self, stage, start):
+        """Record a stage started with _startStage"""
+        if start is not None and self.metrics is not None:
+            self.metrics.record(stage, time.time() - start)
+
+    def printStatic(self, name, elements):
+        """Print a part of a receipt that never changes (e.g. a logo and the address of the shop), given as a list
+        of elements (see stream.runElement). It is rendered the first time, and its printer commands are then kept
+        under name (for each paper width and image encoding), so it is not rendered again:
+            printer.printStatic("header", [ ("printImgFromFile", "logo.png"), ("printFontText", "The Shop") ])"""
+        key = (name, self.width, self.pxWidth, self.motionUnits, self.compactImages, self.rasterImages,
+            self.profile.name)
+        data = _fragmentCache.get(key)
+        if data is None:
+            from .stream import runElement
+            from .transport import BufferTransport
+            with self.redirect(BufferTransport()) as buf:
+                for element in elements:
+                    runElement(self, element)
+            data = _fragmentCache[key] = buf.getvalue()
+        self._transmit(data)
+
+    def loadAssets(self, filename):
+        """Load a bundle of precompiled assets (see POSprinter.assets) to be printed with printAsset"""
+        from .assets import Bundle
+        self.assets = Bundle(filename)
+        return self.assets
+
+    def printAsset(self, name):
+        """Print an asset of the bundle loaded by loadAssets, as compiled for the profile of the printer. Raises
+        ValueError if it was compiled for other paper widths than those of the printer."""
+        self._transmit(self.assets.slice(name, self.profile.name, (self.width, self.pxWidth)))
+
+    def forgetStatic(self, name=None):
+        """Remove the static part name (or all of them) from the cache, e.g. when the logo has changed"""
+        for key in _fragmentCache.keys():
+            if name is None or key[0] == name:
+                del _fragmentCache[key]
+
+    def printTable(self, table, rows, encoding="cp437"):
+        """Print rows of text in columns (e.g. quantity, item, unit price and total on a receipt).
+        table is either a Table object (see POSprinter.table) or a list of Column objects which is then laid out
+        against the character width of the paper. The whole block of rows is sent to the printer in one write.
+        Unicode text is encoded using encoding (the character code table of the printer); a character missing from
+        it is printed as a "?" per character cell (see table.encode), so the columns stay aligned."""
+        from .table import Table, encode
+        if not isinstance(table, Table):
+            table = Table(table, self.width)
+        string = table.render(rows)
+        if isinstance(string, unicode):
+            string = encode(string, encoding)
+        try:
+            self.write(string)
+        except:
+            raise
+
     def lineFeed(self, times=1, cut=False):
         """Write newlines and optional cut paper"""
         while times:
@@ -75,8 +195,11 @@ class POSprinter:
             except:
                 raise
 
-    def lineFeedCut(self, times=6, cut=True):
-        """Enough line feed for the cut to be beneath the previously printed text etc."""
+    def lineFeedCut(self, times=None, cut=True):
+        """Enough line feed for the cut to be beneath the previously printed text etc.
+        By default the number of line feeds needed by the printer (see profiles.Profile.cutFeed)."""
+        if times is None:
+            times = self.profile.cutFeed if cut else 6
         try:
             self.lineFeed(times, cut)
         except:
@@ -85,34 +208,239 @@ class POSprinter:
     def cut(self):
         """Cut paper. You probably want to use lineFeedCut() in most situations."""
         try:
-            self.write("\x1D\x56\x00")
+            self.write(self.profile.cutCommand)
         except:
             raise
+        self.flush()
+
+    def flush(self):
+        """Send what the transport is holding back (e.g. the batch of a scheduler.SendScheduler) and wait until it
+        has been sent. Transports that do not hold anything back (e.g. a job.Job) have no flush."""
+        if hasattr(self.printer, "flush"):
+            self.printer.flush()
+
+    @contextlib.contextmanager
+    def redirect(self, transport, compiling=True):
+        """Temporarily send everything written to transport instead of the printer, e.g.:
+        with printer.redirect(BufferTransport()) as buf:
+            printer.printLine()
+        compiling tells that the output is kept to be sent later (see _transmit)."""
+        printer = self.printer
+        self.printer = transport
+        self._compiling += compiling
+        try:
+            yield transport
+        finally:
+            self.printer = printer
+            self._compiling -= compiling
+
+    @contextlib.contextmanager
+    def job(self):
+        """Compile everything printed within a with statement into a job.Job instead of sending it, e.g.:
+        with printer.job() as job:
+            printer.printLine()
+        print printer.estimate(job)
+        printer.send(job)"""
+        from .job import Job
+        with self.redirect(Job()) as job:
+            yield job
+
+    def send(self, job):
+        """Send a compiled job.Job to the printer"""
+        for chunk in job.chunks:
+            try:
+                self._transmit(chunk)
+            except:
+                raise
+        self.flush()
+
+    def sendCopies(self, job, copies=2, wait=0):
+        """Print a compiled job.Job copies times. If the printer profile supports macros and the job fits in the
+        macro buffer, the job is sent once as a macro (GS :), which the printer executes copies times (GS ^),
+        waiting wait tenths of a second between the copies. Otherwise the compiled job is sent copies times."""
+        macroSize = self.profile.macroSize
+        if copies > 1 and macroSize and job.byteCount <= macroSize:
+            self._transmit(MACRO)
+            self.send(job)
+            self._transmit(MACRO)
+            while copies > 0:
+                self._transmit("\x1D\x5E" + chr(min(copies, 255)) + chr(wait) + "\x00")
+                copies -= 255
+            return
+        for i in range(copies):
+            self.send(job)
+
+    @contextlib.contextmanager
+    def copies(self, copies=2, wait=0):
+        """Print everything printed within a with statement copies times (see sendCopies), e.g.:
+        with printer.copies(2):
+            printer.printFontText("Kitchen")
+            printer.lineFeedCut()"""
+        with self.job() as job:
+            yield job
+        self.sendCopies(job, copies, wait)
+
+    def sendResumable(self, job, **kwargs):
+        """Send a compiled job.Job so that it continues where it was if the serial port fails, after reopening the
+        port (see resume.ResumableSender, which gets the keyword arguments). Returns the sender, which tells how
+        many times the port was reopened."""
+        from .resume import ResumableSender
+        sender = ResumableSender(self, **kwargs)
+        sender.send(job)
+        return sender
+
+    def reopen(self):
+        """Close the serial port and open it again with the same settings, e.g. after a USB serial adapter has
+        been unplugged and plugged in again"""
+        from .scheduler import SendScheduler
+        port = self.printer
+        if isinstance(port, SendScheduler):
+            port = port.port
+        try:
+            port.close()
+        except EnvironmentError:
+            pass
+        port.open()
+
+    def estimate(self, job):
+        """Estimate the size, transmit time and print time of a compiled job.Job (see cost.CostModel.estimate).
+        The estimates use costModel, which is made from the serial settings of the printer the first time and may be
+        calibrated by calibrate()."""
+        if self.costModel is None:
+            from .cost import CostModel
+            self.costModel = CostModel.fromPrinter(self)
+        return self.costModel.estimate(job)
+
+    def calibrate(self, nbytes=None, seconds=None):
+        """Calibrate the transmit time estimates with a measured throughput. Without arguments the throughput
+        measured by the scheduler (see enableScheduler) is used. Raises ValueError if there is no scheduler or
+        nothing has been sent through it yet."""
+        if nbytes is None:
+            from .scheduler import SendScheduler
+            if not isinstance(self.printer, SendScheduler):
+                raise ValueError("calibrate() needs nbytes and seconds unless the scheduler is enabled (see enableScheduler)")
+            if not self.printer.bytesSent or not self.printer.busyTime:
+                raise ValueError("Nothing has been sent through the scheduler yet, so there is no throughput to calibrate with")
+            nbytes, seconds = self.printer.bytesSent, self.printer.busyTime
+        if self.costModel is None:
+            from .cost import CostModel
+            self.costModel = CostModel.fromPrinter(self)
+        self.costModel.calibrate(nbytes, seconds)
+
+    def enableScheduler(self, **kwargs):
+        """Send through a scheduler.SendScheduler, which keeps the receive buffer of the printer full
+        without overrunning it. The keyword arguments are passed on to SendScheduler. Returns the scheduler;
+        its bytesPerSecond is the throughput achieved. The window defaults to the buffer size of the printer profile."""
+        from .scheduler import SendScheduler
+        if self.profile.bufferSize:
+            kwargs.setdefault("window", self.profile.bufferSize)
+        if getattr(self, "statusMonitor", None) is not None:
+            kwargs.setdefault("reader", self.statusMonitor)
+        if not isinstance(self.printer, SendScheduler):
+            self.printer = SendScheduler(self.printer, **kwargs)
+        return self.printer
+
+    @contextlib.contextmanager
+    def pipelined(self, depth=8):
+        """Encode and send at the same time within a with statement: what is written is queued (at most depth
+        writes, e.g. image bands) and sent by a writer thread, so the next band is encoded while the previous
+        one is on the serial line. Everything is sent when the with statement ends, including what a scheduler
+        holds back (see flush). Yields the pipeline.PipelinedTransport, e.g.:
+        with printer.pipelined():
+            printer.printImgFromFile("logo.png")"""
+        from .pipeline import PipelinedTransport
+        pipeline = PipelinedTransport(self.printer, depth)
+        with self.redirect(pipeline, compiling=False):
+            try:
+                yield pipeline
+            finally:
+                pipeline.close()
+        self.flush()
+
+    def startStatusMonitor(self, **kwargs):
+        """Start reading the status of the printer on a background thread (see status.StatusMonitor, which gets
+        the keyword arguments). Returns the monitor, e.g.:
+        monitor = printer.startStatusMonitor(asb=True)
+        monitor.on("paperOut", callback)
+        The monitor wraps the serial port, so its writes and status requests never interleave with the writes of
+        the printer (or of the scheduler, see enableScheduler)."""
+        from .status import StatusMonitor
+        from .scheduler import SendScheduler
+        if isinstance(self.printer, SendScheduler):
+            self.statusMonitor = StatusMonitor(self.printer.port, **kwargs).start()
+            self.printer.port = self.printer.reader = self.statusMonitor
+        else:
+            self.statusMonitor = self.printer = StatusMonitor(self.printer, **kwargs).start()
+        return self.statusMonitor
 
     def close(self):
         """Close the connection to the serial printer"""
         try:
+            self.flush()
+            if getattr(self, "statusMonitor", None):
+                self.statusMonitor.stop()
             self.printer.close()
         except:
             raise
 
-    def printImgFromFile(self, filename, resolution="high", align="center", scale=None, width=None, rotate=None):
+    def warmup(self, fonts=(), qr=True):
+        """Load what printing needs the first time (PIL, fonts and the QR code tables), so that it does not slow
+        down the first receipt. fonts is a list of (fontFile, textSize) used with printFontText.
+        Without warmup everything is loaded when it is first used, which keeps short scripts fast."""
+        from PIL import Image, ImageDraw, ImageFont
+        for fontFile, textSize in fonts:
+            loadFont(fontFile, textSize)
+        if qr:
+            from pyqrnative import PyQRNative
+            PyQRNative.warmup()
+
+    def printImgFromFile(self, filename, resolution="high", align="center", scale=None, width=None, rotate=None, dither=None):
         """Print an image from a file.
         resolution may be set to "high" or "low". Setting it to low makes the image a bit narrow (90x60dpi instead of 180x180 dpi) unless scale is also set.
         align may be set to "left", "center" or "right".
         scale resizes the image with that factor, where 1.0 is the full width of the paper.
-        rotate rotates the image (number of degrees)"""
+        rotate rotates the image (number of degrees)
+        dither is passed on to printImgFromPILObject."""
         try:
-            import Image
-            # Open file and convert to black/white (colour depth of 1 bit)
-            img = Image.open(filename).convert("1")
-            self.printImgFromPILObject(img, resolution, align, scale, width, rotate)
+            from PIL import Image
+            if dither is None:
+                # Open file and convert to black/white (colour depth of 1 bit)
+                img = Image.open(filename).convert("1")
+            else:
+                # Keep the grey levels for the dithering
+                img = Image.open(filename)
+            self.printImgFromPILObject(img, resolution, align, scale, width, rotate, dither)
         except:
             raise
 
-    def printImgFromPILObject(self, imgObject, resolution="high", align="center", scale=None, width=None, rotate=None):
-        """The object must be a Python ImageLibrary object, and the colordepth should be set to 1."""
+    def printImgFromPILObject(self, imgObject, resolution="high", align="center", scale=None, width=None, rotate=None, dither=None):
+        """The object must be a Python ImageLibrary object, and the colordepth should be set to 1.
+        If dither is set the image may have any colour depth. It is then converted by a dither.Pipeline (or
+        a Pipeline with the method named by dither, e.g. "bayer"), which rotates and resizes the image before
+        converting it to black/white."""
+        start = self._startStage()
         try:
+            if dither is not None:
+                from .dither import Pipeline
+                if not isinstance(dither, Pipeline):
+                    dither = Pipeline(dither)
+                if rotate and rotate % 90:
+                    # The size is only known after rotating
+                    imgObject = imgObject.rotate(rotate, expand=True)
+                    rotate = None
+                if rotate and rotate % 180:
+                    size = (imgObject.size[1], imgObject.size[0])
+                else:
+                    size = imgObject.size
+                imgObjectB = dither.process(imgObject, self.imgSize(size, resolution, scale, width), rotate)
+                self._endStage("convert", start)
+                self.printBitmap(imgObjectB, resolution, align)
+                return
+            if rotate and not rotate % 90 and imgObject.mode == "1" and not width and not scale:
+                # Nothing to convert, so the encoder reads the image in rotated order instead of rotating it
+                self._endStage("convert", start)
+                self.printBitmap(imgObject, resolution, align, rotate % 360)
+                return
             if rotate:
                 imgObject = imgObject.rotate(rotate, expand=True)
             # If a width in px is set. If the scale factor is also set this is applied afterwords.
@@ -135,75 +463,249 @@ class POSprinter:
             else:
                 # Convert to binary colour depth
                 imgObjectB = imgObject.convert("1")
-            # Convert to a pixel access object
-            imgMatrix = imgObjectB.load()
-            width  = imgObjectB.size[0]
-            height = imgObjectB.size[1]
-            # Print it
-            self.printImgMatrix(imgMatrix, width, height, resolution, align)
+            self._endStage("convert", start)
+            self.printBitmap(imgObjectB, resolution, align)
         except:
             raise
 
-    def printImgMatrix(self, imgMatrix, width, height, resolution, align):
-        """Print an image as a pixel access object with binary colour."""
+    def imgSize(self, size, resolution="high", scale=None, width=None):
+        """The size in dots an image of size (width, height) is printed with by printImgFromPILObject."""
+        if width:
+            size = (width, int(size[1]*float(width)/size[0]))
+        if scale:
+            assert type(scale)==float
+            if scale > 1.0 or scale <= 0.0:
+                raise ValueError("scale: Scaling factor must be larger than 0.0 and maximum 1.0")
+            # Give a consistent output regardless of the resolution setting
+            scale *= self.pxWidth/float(size[0])
+            if resolution == "high":
+                scaleTuple = (  scale * 2, scale * 2 )
+            else:
+                scaleTuple = ( scale, scale * 2/3.0 )
+            size = tuple([ int(scaleTuple[i] * size[i]) for i in range(2) ])
+        return tuple(size)
+
+    def printBitmap(self, imgObject, resolution="high", align="center", rotate=None):
+        """Print a PIL image which is already black/white (mode "1") and of the right size, without any conversion.
+        This is useful for images that are preprocessed once (see dither.Pipeline) and printed many times.
+        rotate (0, 90, 180 or 270 degrees counter clockwise, like PIL's rotate) is done while encoding."""
+        # Convert to a pixel access object
+        imgMatrix = imgObject.load()
+        width  = imgObject.size[0]
+        height = imgObject.size[1]
+        # Print it
+        self.printImgMatrix(imgMatrix, width, height, resolution, align, rotate)
+
+    def printImgStream(self, source, resolution="high", align="center", dither=None):
+        """Print a (very tall) image band by band. Each band is converted, encoded and sent to the printer before
+        the next band is read, so printing starts at once and only one band is held in memory at a time.
+        source is a PIL image, a bands.PBMSource or a filename. Raw PBM files (*.pbm) are read through mmap;
+        other file formats are decoded by PIL, which may have to decode the whole file.
+        The image is printed in its own size (it is not scaled). dither is an optional dither.Pipeline."""
+        from .bands import PBMSource, iterBands
+        opened = None
+        if isinstance(source, basestring):
+            if source.lower().endswith(".pbm"):
+                source = opened = PBMSource(source)
+            else:
+                from PIL import Image
+                source = Image.open(source)
+        try:
+            for band in iterBands(source, 24 if resolution == "high" else 8, dither):
+                self.printImgMatrix(band.load(), band.size[0], band.size[1], resolution, align)
+        finally:
+            if opened:
+                opened.close()
+
+    def printImgMatrix(self, imgMatrix, width, height, resolution, align, rotate=None):
+        """Print an image as a pixel access object with binary colour (see iterImgBands)."""
+        bands = self.iterImgBands(imgMatrix, width, height, resolution, align, rotate)
+        while True:
+            start = self._startStage()
+            band = next(bands, None)
+            if band is None:
+                break
+            if start is not None:
+                self.metrics.record("encode", time.time() - start, len(band))
+            try:
+                self.write(band)
+            except:
+                raise
+
+    def iterImgBands(self, imgMatrix, width, height, resolution, align, rotate=None):
+        """Generate the printer commands for an image as a pixel access object with binary colour.
+        Each generated string is one band (a line of 8 or 24 dots).
+        width and height are the size of the image. If rotate is set (90, 180 or 270 degrees counter clockwise)
+        the image is printed rotated, by reading its pixels in rotated order.
+        If compactImages is set on the printer, blank bands are replaced by paper feed, the blank columns
+        (alignment and white margins of the image) are skipped by positioning the print head, and the bands are
+        fed with ESC J instead of newlines. If rasterImages is also set, high resolution images are sent as
+        raster bit images (GS v 0)."""
         if resolution == "high":
             scaling = 24
             currentpxWidth = self.pxWidth * 2
+            # Set mode to 24-dot double density
+            mode = "\x1B\x2A\x21"
         else:
             scaling = 8
             currentpxWidth = self.pxWidth
+            # Set mode to 8-dot single density (60 dpi).
+            mode = "\x1B\x2A\x00"
+        orientation = self._orientation(width, height, rotate)
+        # The size of the image as printed
+        width, height = len(orientation[0]), len(orientation[1])
         if width > currentpxWidth:
             raise ValueError("Image too wide. Maximum width is configured to be " + str(currentpxWidth) + "pixels. The image is " + str(width) + " pixels wide.")
-        for yScale in range(-(-height/scaling)):
-            # Set mode to hex and 8-dot single density (60 dpi).
-            if resolution == "high":
-                outList = [ "0x1B", "0x2A", "0x21" ]
+        # Add width to the communication to the printer. Depending on the alignment we count that in and add blank vertical lines
+        if align == "left":
+            blanks = 0
+        elif align == "center":
+            blanks = ( currentpxWidth - width ) // 2
+        elif align == "right":
+            blanks = currentpxWidth - width
+        else:
+            raise ValueError("align must be either \"left\", \"center\" or \"right\"")
+        if self.compactImages:
+            if self.rasterImages and resolution == "high":
+                bands = self._iterRasterBands(imgMatrix, orientation, blanks)
             else:
-                outList = [ "0x1B", "0x2A", "0x00" ]
-            # Add width to the communication to the printer. Depending on the alignment we count that in and add blank vertical lines to the outList
-            if align == "left":
-                blanks = 0
-            if align == "center":
-                blanks = ( currentpxWidth - width ) / 2
-            if align == "right":
-                blanks = currentpxWidth - width
-            highByte  = ( width + blanks ) / 256
-            lowByte = ( width + blanks )% 256
-            outList.append(hex(lowByte))
-            outList.append(hex(highByte))
-            if resolution == "high":
-                blanks *= 3
-            if align == "left":
-                pass
-            if align == "center":
-                for i in range(blanks):
-                    outList.append(hex(0))
-            if align == "right":
-                for i in range(blanks):
-                    outList.append(hex(0))
-            for x in range(width):
-                # Compute hex string for one vertical bar of 8 dots (zero padded from the bottom if necessary).
-                binStr = ""
-                for y in range(scaling):
-                    # Indirect zero padding. Do not try to extract values from images beyond its size.
-                    if ( yScale * scaling + y ) < height:
-                        binStr += "0" if imgMatrix[x, yScale * scaling + y] == 255 else "1" 
-                    # Zero padding
-                    else:
-                        binStr += "0"
-                outList.append(hex(int(binStr[0:8], 2)))
-                if resolution == "high":
-                    outList.append(hex(int(binStr[8:16], 2)))
-                    outList.append(hex(int(binStr[16:24], 2)))
-            for element in outList:
-                try:
-                    self.write(chr(int(element, 16)))
-                except:
-                    raise
-            try:
-                self.write("\n")
-            except:
-                raise
+                bands = self._iterCompactBands(imgMatrix, orientation, resolution, blanks)
+            for band in bands:
+                yield band
+            return
+        header = mode + chr(( width + blanks ) % 256) + chr(( width + blanks ) // 256) + "\x00" * (blanks * scaling // 8)
+        for band in self._iterBandColumns(imgMatrix, orientation, scaling):
+            yield header + str(band) + "\n"
+
+    def _orientation(self, width, height, rotate):
+        """How to read an image of width x height rotated by rotate degrees (counter clockwise): returns the source
+        coordinates of the printed columns and of the printed rows, and whether the source is transposed, i.e. the
+        pixel printed at (column, row) is imgMatrix[rows[row], columns[column]] instead of
+        imgMatrix[columns[column], rows[row]]."""
+        if not rotate:
+            return range(width), range(height), False
+        if rotate == 90:
+            return range(height), range(width - 1, -1, -1), True
+        if rotate == 180:
+            return range(width - 1, -1, -1), range(height - 1, -1, -1), False
+        if rotate == 270:
+            return range(height - 1, -1, -1), range(width), True
+        raise ValueError("rotate must be 0, 90, 180 or 270")
+
+    def _iterBandColumns(self, imgMatrix, orientation, scaling):
+        """Generate the column bytes of each band (a line of 8 or 24 dots) of an image as a pixel access object,
+        read in the order given by orientation (see _orientation)."""
+        columns, allRows, transposed = orientation
+        for top in range(0, len(allRows), scaling):
+            # Zero padding from the bottom if necessary. Do not try to extract values from images beyond its size.
+            rows = allRows[top:top + scaling]
+            padding = scaling - len(rows)
+            band = bytearray()
+            for x in columns:
+                # Compute one vertical bar of 8 or 24 dots
+                bar = 0
+                if transposed:
+                    for y in rows:
+                        bar = bar << 1 | (imgMatrix[y, x] != 255)
+                else:
+                    for y in rows:
+                        bar = bar << 1 | (imgMatrix[x, y] != 255)
+                bar <<= padding
+                if scaling == 24:
+                    band.append(bar >> 16)
+                    band.append(bar >> 8 & 0xFF)
+                band.append(bar & 0xFF)
+            yield band
+
+    def feedDots(self, dots, resolution="high"):
+        """The printer commands to feed the paper a number of image dots (of the given resolution) with ESC J"""
+        # High resolution images are 180 dpi vertically and low resolution images 60 dpi
+        units = dots * self.motionUnits[1] // (180 if resolution == "high" else 60)
+        out = ""
+        while units > 0:
+            out += "\x1B\x4A" + chr(min(units, 255))
+            units -= 255
+        return out
+
+    def _position(self, dots, resolution):
+        """The printer command for moving the print position to a number of dots from the left margin (ESC $)"""
+        # High resolution images are 180 dpi horizontally and low resolution images 90 dpi
+        units = dots * self.motionUnits[0] // (180 if resolution == "high" else 90)
+        if not units:
+            return ""
+        return "\x1B\x24" + chr(units % 256) + chr(units // 256)
+
+    def _iterCompactBands(self, imgMatrix, orientation, resolution, blanks):
+        """Bit image bands (ESC *) without blank bands and blank columns"""
+        if resolution == "high":
+            scaling = 24
+            mode = "\x1B\x2A\x21"
+        else:
+            scaling = 8
+            mode = "\x1B\x2A\x00"
+        bytesPerColumn = scaling // 8
+        feed = 0
+        for band in self._iterBandColumns(imgMatrix, orientation, scaling):
+            end = len(band.rstrip("\x00"))
+            if not end:
+                feed += scaling
+                continue
+            # Round the blank bytes to whole columns
+            first = (len(band) - len(band.lstrip("\x00"))) // bytesPerColumn
+            last = -(-end // bytesPerColumn)
+            columns = band[first * bytesPerColumn:last * bytesPerColumn]
+            n = last - first
+            yield (self.feedDots(feed, resolution) + self._position(blanks + first, resolution) + mode + chr(n % 256) + chr(n // 256)
+                + str(columns) + self.feedDots(scaling, resolution))
+            feed = 0
+        if feed:
+            yield self.feedDots(feed, resolution)
+
+    def _iterRasterBands(self, imgMatrix, orientation, blanks, rowsPerBand=24):
+        """Raster bit image bands (GS v 0) without blank bands. Blank bytes to the left are skipped by setting
+        the left margin (GS L). Only for high resolution images."""
+        columns, allRows, transposed = orientation
+        width = len(columns)
+        rowBytes = -(-(blanks + width) // 8)
+        shift = rowBytes * 8 - blanks - width
+        feed = 0
+        margin = 0
+        for top in range(0, len(allRows), rowsPerBand):
+            rows = []
+            for y in allRows[top:top + rowsPerBand]:
+                bits = 0
+                if transposed:
+                    for x in columns:
+                        bits = bits << 1 | (imgMatrix[y, x] != 255)
+                else:
+                    for x in columns:
+                        bits = bits << 1 | (imgMatrix[x, y] != 255)
+                rows.append(bits << shift)
+            if not any(rows):
+                feed += len(rows)
+                continue
+            # Skip blank bytes to the left and to the right of the image
+            lead = min([ rowBytes * 8 - bits.bit_length() for bits in rows if bits ]) // 8
+            xBytes = rowBytes - min([ (bits & -bits).bit_length() - 1 for bits in rows if bits ]) // 8
+            data = "".join([ ("%0*x" % (rowBytes * 2, bits))[lead * 2:xBytes * 2] for bits in rows ]).decode("hex")
+            out = self.feedDots(feed)
+            if lead != margin:
+                out += self._leftMargin(lead * 8)
+                margin = lead
+            xBytes -= lead
+            yield (out + "\x1D\x76\x30\x00" + chr(xBytes % 256) + chr(xBytes // 256)
+                + chr(len(rows) % 256) + chr(len(rows) // 256) + data)
+            feed = 0
+        out = self.feedDots(feed)
+        if margin:
+            out += self._leftMargin(0)
+        if out:
+            yield out
+
+    def _leftMargin(self, dots):
+        """The printer command for setting the left margin to a number of high resolution dots (GS L)"""
+        units = dots * self.motionUnits[0] // 180
+        return "\x1D\x4C" + chr(units % 256) + chr(units // 256)
 
     def printFontText(self, text, resolution="high", align="left", 
         fontFile="/usr/share/fonts/truetype/ubuntu-font-family/Ubuntu-B.ttf", 
@@ -214,14 +716,15 @@ class POSprinter:
         Arg. 'leading' is the interline spacing in as a proportion of the height of a line.
         Arg. 'scale' is the proportion of the width of the paper.
         returnPILObject returns the printed PIL Image object that is printet (or would have been printed if dontPrint is set to True."""
-        import ImageFont, ImageDraw, Image
+        start = self._startStage()
+        from PIL import ImageFont, ImageDraw, Image
         if resolution == "high":
             currentpxWidth = self.pxWidth * 2
         else:
             currentpxWidth = self.pxWidth
         if not txtWidth:
             txtWidth = currentpxWidth
-        font = ImageFont.truetype(fontFile, textSize)
+        font = loadFont(fontFile, textSize)
 
         def splitList(txtWidth, txtList, font, newlineSplitOnly=False):
             """Each str/unicode in txtList equals one line when printet. Split at newlines and furthermore split if a line is too wide."""
@@ -308,21 +811,27 @@ class POSprinter:
             draw.text(pointer, txt, font=font, fill=fontColor)
             pointer[1] += lineHeight + leadingDots
 
+        # Unless the rotated image is needed, the image is rotated while it is encoded (see iterImgBands)
+        encodeRotate = None
         if rotate:
             angles = [0, 90, 180, 270]
-            if rotate in angles:
+            if rotate not in angles:
+                raise ValueError("rotate must be part of %s if set " % str(angles))
+            if returnPILObject or scale:
                 img = img.rotate(rotate, expand=True)
             else:
-                raise ValueError("rotate must be part of %s if set " % str(angles))
+                encodeRotate = rotate
+        printedWidth = img.size[1] if encodeRotate in [90, 270] else img.size[0]
         if rotate in [90, 270]:
-            if img.size[0] > currentpxWidth and not scale:
+            if printedWidth > currentpxWidth and not scale:
                 raise Exception("The textSize is too large to print. Use either a smaller textSize or the scale parameter")
         else:
-            if img.size[0] > currentpxWidth:
+            if printedWidth > currentpxWidth:
                 raise Exception("Could not print the text. One or more lines are too wide. Did you choose a very large font?")
 
+        self._endStage("layout", start)
         if not dontPrint:
-            self.printImgFromPILObject(img, resolution=resolution, align=align, scale=scale)
+            self.printImgFromPILObject(img, resolution=resolution, align=align, scale=scale, rotate=encodeRotate)
         if returnPILObject:
             if align is not "left":
                 imgOld = img
@@ -337,22 +846,131 @@ class POSprinter:
                 img.paste(imgOld,((txtWidth-imgOld.size[0])/i,0))
             return img
 
-    def printLine(self, pxWidth=False, width=1.0, pxThickness=4, pxHeading=10, pxTrailing=10, resolution="high", returnPILObject=False, dontPrint=False):
+    def printQR(self, data, version=5, level="M", moduleSize=6, align="center", maskStrategy=None):
+        """Print a QR code of data with error correction level "L", "M", "Q" or "H" and modules of moduleSize
+        high resolution dots. If the printer profile supports it the printer makes the QR code (GS ( k), which
+        only sends the data. Otherwise the QR code (of the given version) is made by pyqrnative and printed
+        as an image. maskStrategy ("optimal", "heuristic" or "fixed", see PyQRNative.QRMaskStrategy) trades
+        the quality of the symbol for speed when many codes are printed."""
+        if self.profile.nativeQR:
+            self.write(self.qrCommands(data, level, moduleSize, align))
+            return
+        self.printBitmap(self.qrImage(data, version, level, moduleSize, maskStrategy), "high", align)
+
+    def qrImage(self, data, version=5, level="M", moduleSize=6, maskStrategy=None):
+        """A QR code made by pyqrnative as a black/white PIL image with modules of moduleSize dots"""
+        from PIL import Image
+        from pyqrnative import PyQRNative
+        start = self._startStage()
+        qr = PyQRNative.QRCode(version, getattr(PyQRNative.QRErrorCorrectLevel, level))
+        qr.addData(data)
+        qr.make(maskStrategy)
+        # A quiet zone of 4 modules around the code
+        count = qr.getModuleCount()
+        img = Image.new("1", (count + 8, count + 8), 255)
+        pixels = img.load()
+        for r in range(count):
+            for c in range(count):
+                if qr.isDark(r, c):
+                    pixels[c + 4, r + 4] = 0
+        img = img.resize(((count + 8) * moduleSize, (count + 8) * moduleSize))
+        self._endStage("qr", start)
+        return img
+
+    def qrCommands(self, data, level="M", moduleSize=6, align="center"):
+        """The printer commands printing a QR code made by the printer (GS ( k, model 2)"""
+        store = "1P0" + data
+        justify = { "left": "\x00", "center": "\x01", "right": "\x02" }[align]
+        return ("\x1B\x61" + justify
+            + "\x1D\x28\x6B\x04\x00\x31\x41\x32\x00"
+            + "\x1D\x28\x6B\x03\x00\x31\x43" + chr(moduleSize)
+            + "\x1D\x28\x6B\x03\x00\x31\x45" + chr(48 + "LMQH".index(level))
+            + "\x1D\x28\x6B" + chr(len(store) % 256) + chr(len(store) // 256) + store
+            + "\x1D\x28\x6B\x03\x00\x31\x51\x30"
+            + "\x1B\x61\x00")
+
+    def printBarcode(self, data, symbology="code128", height=80, moduleWidth=2, hri=True, align="center"):
+        """Print a barcode of data. symbology is "ean13", "code128" or "itf" (see POSprinter.barcode).
+        height is in high resolution dots and moduleWidth is the width of the narrowest bar in dots.
+        If hri is set the data is printed below the barcode. If the printer profile supports it the printer makes
+        the barcode (GS k), otherwise it is sent as a raster or bit image built straight from the bars."""
+        from . import barcode
+        self.write(barcode.commands(data, symbology, self.profile.nativeBarcodes, self.rasterImages, self.pxWidth * 2,
+            height, moduleWidth, hri, align))
+
+    @contextlib.contextmanager
+    def page(self, height, fontFile=None, textSize=24):
+        """Compose text, images and QR codes side by side on a page of height high resolution dots (see
+        POSprinter.page), which is printed at the end of the with statement:
+            with printer.page(200) as page:
+                page.text(0, 0, "Total 12.00")
+                page.qr(400, 0, "http://www.sman.dk", moduleSize=4)"""
+        from .page import Page
+        page = Page(self, height, fontFile, textSize)
+        yield page
+        page.printPage()
+
+    def printLine(self,pxWidth=False, width=1.0, pxThickness=4, pxHeading=10, pxTrailing=10, resolution="high", returnPILObject=False, dontPrint=False, style="solid", native=False):
         """Prints a horisontal line.
-        If width is set then pxWidth is ignored. width higher than 1.0 is ignored."""
+        If width is set then pxWidth is ignored. width higher than 1.0 is ignored.
+        style may be set to "solid", "dashed", "dotted" or "double".
+        The printer commands for a line are computed once per printer width, resolution and line settings, and
+        then reused. If native is True the line is printed with characters of the printer font instead of an image
+        (a few bytes instead of a full image), and only width and style are used."""
+        if native:
+            try:
+                self.write(RULE_CHARS[style] * int(self.width * min(width, 1.0)) + "\n", align="center")
+            except:
+                raise
+            return
         # calculate dimensions
         if resolution == "high":
             currentpxWidth = self.pxWidth * 2
+        else:
+            currentpxWidth = self.pxWidth
         if not pxWidth:
             pxWidth = int(currentpxWidth * width)
-        import Image, ImageDraw
-        pxHeight = pxHeading + pxThickness + pxTrailing
-        img = Image.new("1", (currentpxWidth, pxHeight))
-        draw = ImageDraw.Draw(img)
-        draw.rectangle((0,0,currentpxWidth, pxHeight), fill=255)
-        draw.rectangle(((currentpxWidth - pxWidth)/2,pxHeading,(currentpxWidth - pxWidth)/2 + pxWidth,pxHeading+pxThickness), fill=0)
+        key = (self.pxWidth, resolution, pxWidth, pxThickness, pxHeading, pxTrailing, style,
+            self.compactImages, self.rasterImages, self.motionUnits)
+        if returnPILObject or key not in _lineCache:
+            img = self._lineImage(currentpxWidth, pxWidth, pxThickness, pxHeading, pxTrailing, style)
+            if key not in _lineCache:
+                from .transport import BufferTransport
+                with self.redirect(BufferTransport()) as buf:
+                    self.printImgFromPILObject(img, resolution=resolution)
+                _lineCache[key] = buf.getvalue()
         if not dontPrint:
-            self.printImgFromPILObject(img, resolution=resolution)
+            try:
+                self.write(_lineCache[key])
+            except:
+                raise
         if returnPILObject:
             return img
 
+    def _lineImage(self, currentpxWidth, pxWidth, pxThickness, pxHeading, pxTrailing, style):
+        """Draw a horisontal line as a PIL image the full width of the paper"""
+        from PIL import Image, ImageDraw
+        if style not in RULE_CHARS:
+            raise ValueError("style must be part of %s if set " % str(sorted(RULE_CHARS)))
+        if style == "double":
+            # Two lines with a gap of the same thickness
+            pxHeight = pxHeading + pxThickness * 3 + pxTrailing
+        else:
+            pxHeight = pxHeading + pxThickness + pxTrailing
+        img = Image.new("1", (currentpxWidth, pxHeight))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((0,0,currentpxWidth, pxHeight), fill=255)
+        left = (currentpxWidth - pxWidth) // 2
+        if style == "solid":
+            draw.rectangle((left,pxHeading,left + pxWidth,pxHeading+pxThickness), fill=0)
+        elif style == "double":
+            draw.rectangle((left,pxHeading,left + pxWidth,pxHeading+pxThickness-1), fill=0)
+            draw.rectangle((left,pxHeading+pxThickness*2,left + pxWidth,pxHeading+pxThickness*3-1), fill=0)
+        else:
+            if style == "dashed":
+                dash = max(pxThickness * 3, 8)
+            else:
+                dash = pxThickness
+            for x in range(left, left + pxWidth, dash * 2):
+                draw.rectangle((x,pxHeading,min(x + dash, left + pxWidth) - 1,pxHeading+pxThickness-1), fill=0)
+        return img
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Bundles of precompiled assets (logos, fixed QR codes, text rendered with truetype fonts etc.): the printer
+commands of each asset for each printer profile, in a single file which is read through mmap. Printing an asset is
+then a single write of a slice of the file (see POSprinter.loadAssets and POSprinter.printAsset).
+
+Compile a bundle from a directory:
+    python -m POSprinter.assets --profile default --profile tm-t88iii assets.bundle assets/
+Images (.gif, .png, .jpg, .bmp, .pbm) are printed with printImgFromFile, a file name.qr is a QR code of its
+contents and a file name.bin is copied as it is (printer commands). Assets are named after their file name without
+the extension. Other assets are given to compileBundle() as lists of elements (see stream.runElement).
+
+The file is "POSBNDL2", the length of the index (4 bytes, big endian), the index (JSON: { profile: { "widths":
+[ charWidth, pxWidth ], "assets": { name: [ offset, length ] } } }, where offset is from the end of the index) and the
+printer commands of the assets. The widths are those of the paper the assets were compiled for, as a printer
+with other widths needs other printer commands."""
+import json
+import mmap
+import optparse
+import os
+import struct
+
+MAGIC = "POSBNDL2"
+IMAGE_EXTENSIONS = (".gif", ".png", ".jpg", ".jpeg", ".bmp", ".pbm")
+
+def directoryElements(directory, imageOptions=None):
+    """The assets of the files in directory as { name: elements }"""
+    assets = {}
+    for filename in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(filename)
+        path = os.path.join(directory, filename)
+        extension = extension.lower()
+        if extension in IMAGE_EXTENSIONS:
+            assets[name] = [ ("printImgFromFile", path, dict(imageOptions or {})) ]
+        elif extension == ".qr":
+            assets[name] = [ ("printQR", open(path).read().strip()) ]
+        elif extension == ".bin":
+            assets[name] = [ ("write", open(path, "rb").read()) ]
+    return assets
+
+def compileBundle(filename, directory=None, elements=None, profiles=("default",), imageOptions=None, charWidth=None,
+    pxWidth=None):
+    """Compile the assets of directory (see directoryElements) and elements ({ name: list of elements }) for
+    each of profiles and write the bundle to filename. charWidth and pxWidth override the paper widths of the
+    profiles (see POSprinter)."""
+    from .POSprinter import POSprinter
+    from .job import Job
+    from .stream import runElement
+    assets = {}
+    if directory:
+        assets.update(directoryElements(directory, imageOptions))
+    assets.update(elements or {})
+    index = {}
+    payloads = []
+    offset = 0
+    for profile in profiles:
+        printer = POSprinter(transport=Job(), profile=profile, charWidth=charWidth, pxWidth=pxWidth)
+        entries = {}
+        index[printer.profile.name] = { "widths": [ printer.width, printer.pxWidth ], "assets": entries }
+        for name in sorted(assets):
+            with printer.job() as job:
+                for element in assets[name]:
+                    runElement(printer, element)
+            data = job.data
+            entries[name] = [ offset, len(data) ]
+            payloads.append(data)
+            offset += len(data)
+    indexData = json.dumps(index, sort_keys=True)
+    tmp = filename + ".tmp"
+    f = open(tmp, "wb")
+    try:
+        f.write(MAGIC + struct.pack(">I", len(indexData)) + indexData)
+        for data in payloads:
+            f.write(data)
+    finally:
+        f.close()
+    os.rename(tmp, filename)
+    return index
+
+
+class Bundle:
+    """A compiled bundle, read through mmap. slice() returns the printer commands of an asset without copying them."""
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            if self.map[:len(MAGIC) - 1] == MAGIC[:-1]:
+                raise ValueError("%s is an asset bundle of an older version; compile it again" % filename)
+            raise ValueError("%s is not an asset bundle" % filename)
+        length = struct.unpack(">I", self.map[len(MAGIC):len(MAGIC) + 4])[0]
+        self.index = json.loads(self.map[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+        self.start = len(MAGIC) + 4 + length
+
+    def names(self, profile="default"):
+        """Names of the assets compiled for profile"""
+        return sorted(self.index.get(profile, { "assets": {} })["assets"])
+
+    def slice(self, name, profile="default", widths=None):
+        """The printer commands of asset name for profile, as a buffer of the mapped file. If widths (charWidth,
+        pxWidth) is given, it must be the widths the asset was compiled for."""
+        try:
+            entry = self.index[profile]
+            offset, length = entry["assets"][name]
+        except KeyError:
+            raise ValueError("Asset %r is not compiled for the %s profile" % (name, profile))
+        if widths is not None and list(widths) != entry["widths"]:
+            raise ValueError("Asset %r is compiled for a paper width of %d characters and %d dots, not %d and %d"
+                % ((name,) + tuple(entry["widths"]) + tuple(widths)))
+        return buffer(self.map, self.start + offset, length)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options] bundle directory")
+    parser.add_option("-p", "--profile", dest="profiles", action="append",
+        help="printer profile to compile for (may be repeated; default: default)")
+    parser.add_option("--scale", type="float", help="scale of images (1.0 is the full width of the paper)")
+    parser.add_option("--resolution", default="high", help="resolution of images (default %default)")
+    parser.add_option("--char-width", type="int", dest="charWidth", help="paper width in characters (default: the profile's)")
+    parser.add_option("--px-width", type="int", dest="pxWidth", help="paper width in dots (default: the profile's)")
+    options, args = parser.parse_args()
+    if len(args) != 2:
+        parser.error("give the bundle file and the asset directory")
+    imageOptions = { "resolution": options.resolution }
+    if options.scale:
+        imageOptions["scale"] = options.scale
+    index = compileBundle(args[0], args[1], profiles=options.profiles or [ "default" ], imageOptions=imageOptions,
+        charWidth=options.charWidth, pxWidth=options.pxWidth)
+    for profile in sorted(index):
+        print("%s: %s" % (profile, ", ".join(sorted(index[profile]["assets"]))))
+
+if __name__ == "__main__":
+    main()
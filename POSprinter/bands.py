@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Band by band access to (very tall) images, so they can be printed without holding the whole image in memory"""
+import mmap
+from PIL import Image
+
+class PBMSource:
+    """A raw (P4) PBM file accessed through mmap. Only the rows of the band being printed are read,
+    so the memory used does not depend on the height of the image."""
+    def __init__(self, filename):
+        self.file = open(filename, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size, self.offset = self._parseHeader()
+        self.rowBytes = -(-self.size[0] // 8)
+
+    def _parseHeader(self):
+        """Return the size and the offset of the pixel data"""
+        fields = []
+        pos = 0
+        while len(fields) < 3:
+            # Skip whitespace and comments
+            while self.map[pos] in " \t\r\n":
+                pos += 1
+            if self.map[pos] == "#":
+                pos = self.map.find("\n", pos)
+                continue
+            end = pos
+            while self.map[end] not in " \t\r\n#":
+                end += 1
+            fields.append(self.map[pos:end])
+            pos = end
+        if fields[0] != "P4":
+            raise ValueError("Only raw PBM files (P4) are supported")
+        # A single whitespace character separates the header from the pixel data
+        return (int(fields[1]), int(fields[2])), pos + 1
+
+    def crop(self, box):
+        """Return the full width rows box[1] to box[3] as a PIL image (mode "1"). Only the rows are taken from
+        box, as the printer always needs full rows."""
+        top, bottom = box[1], min(box[3], self.size[1])
+        data = self.map[self.offset + top * self.rowBytes:self.offset + bottom * self.rowBytes]
+        # PBM uses 1 for black, PIL uses 1 for white
+        return Image.frombytes("1", (self.size[0], bottom - top), data, "raw", "1;I", self.rowBytes)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def iterBands(source, bandHeight, dither=None):
+    """Generate the bands of source (a PIL image or a PBMSource) from the top as 1 bit PIL images of bandHeight rows
+    (the last band may be lower). dither is an optional dither.Pipeline converting the bands without seams between
+    them (see Pipeline.processBands); threshold, bayer and Floyd-Steinberg are all supported."""
+    width, height = source.size
+    bands = ( source.crop((0, top, width, min(top + bandHeight, height))) for top in range(0, height, bandHeight) )
+    if dither is not None:
+        bands = dither.processBands(bands)
+    for band in bands:
+        if band.mode != "1":
+            band = band.convert("1")
+        yield band
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""1D barcodes (EAN-13, Code 128 and ITF). The encoders return the modules of a barcode as a string of "1" (bar)
+and "0" (space), which commands() turns into printer commands: GS k if the printer makes the barcode itself,
+otherwise a raster (GS v 0) or bit image (ESC *) built directly from the modules."""
+
+EAN13 = "ean13"
+CODE128 = "code128"
+ITF = "itf"
+
+# EAN-13: modules of the digits in the L (odd parity) set; R is the complement of L and G is R reversed
+_EAN_L = [ "0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011" ]
+_EAN_R = [ code.replace("0", "x").replace("1", "0").replace("x", "1") for code in _EAN_L ]
+_EAN_G = [ code[::-1] for code in _EAN_R ]
+_EAN_CODES = { "L": _EAN_L, "G": _EAN_G }
+# Sets of the left hand digits, given by the first digit
+_EAN_PARITY = [ "LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL" ]
+
+# Code 128: widths of bar, space, bar, space, bar, space of the symbol values 0-105 and of the stop symbol
+_CODE128_WIDTHS = ("212222 222122 222221 121223 121322 131222 122213 122312 132212 221213 221312 231212 112232 "
+    "122132 122231 113222 123122 123221 223211 221132 221231 213212 223112 312131 311222 321122 321221 312212 322112 "
+    "322211 212123 212321 232121 111323 131123 131321 112313 132113 132311 211313 231113 231311 112133 112331 132131 "
+    "113123 113321 133121 313121 211331 231131 213113 213311 213131 311123 311321 331121 312113 312311 332111 314111 "
+    "221411 431111 111224 111422 121124 121421 141122 141221 112214 112412 122114 122411 142112 142211 241211 221114 "
+    "413111 241112 134111 111242 121142 121241 114212 124112 124211 411212 421112 421211 212141 214121 412121 111143 "
+    "111341 131141 114113 114311 411113 411311 113141 114131 311141 411131 211412 211214 211232").split()
+_CODE128_STOP = "2331112"
+CODE_C, CODE_B, START_B, START_C = 99, 100, 104, 105
+
+# ITF: narrow (n) and wide (w) elements of the digits
+_ITF_DIGITS = [ "nnwwn", "wnnnw", "nwnnw", "wwnnn", "nnwnw", "wnwnn", "nwwnn", "nnnww", "wnnwn", "nwnwn" ]
+ITF_WIDE = 3
+
+def widthsToModules(widths):
+    """Modules of alternating bars and spaces of the given widths (starting with a bar)"""
+    return "".join([ ("1" if i % 2 == 0 else "0") * int(w) for i, w in enumerate(widths) ])
+
+_CODE128_MODULES = [ widthsToModules(widths) for widths in _CODE128_WIDTHS ]
+_CODE128_STOP_MODULES = widthsToModules(_CODE128_STOP)
+
+def eanCheckDigit(digits):
+    """The check digit of the first 12 digits of an EAN-13"""
+    total = sum([ int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits[:12]) ])
+    return str((10 - total % 10) % 10)
+
+def ean13(digits):
+    """Modules of an EAN-13 of 12 digits (the check digit is added) or 13 digits (the check digit is verified)"""
+    if not digits.isdigit() or len(digits) not in (12, 13):
+        raise ValueError("EAN-13 takes 12 or 13 digits, not %r" % digits)
+    check = eanCheckDigit(digits)
+    if len(digits) == 13 and digits[12] != check:
+        raise ValueError("Wrong EAN-13 check digit in %r (should be %s)" % (digits, check))
+    digits = digits[:12] + check
+    parity = _EAN_PARITY[int(digits[0])]
+    left = "".join([ _EAN_CODES[p][int(d)] for p, d in zip(parity, digits[1:7]) ])
+    right = "".join([ _EAN_R[int(d)] for d in digits[7:] ])
+    return "101" + left + "01010" + right + "101"
+
+def code128Values(data):
+    """Symbol values of data in Code 128 (code set B, switching to code set C for runs of digits), with the
+    start symbol and the check symbol"""
+    values = []
+    i = 0
+    codeSet = None
+    while i < len(data):
+        run = 0
+        while i + run < len(data) and data[i + run].isdigit():
+            run += 1
+        # Code set C (two digits per symbol) pays off for 4 digits at the start or end, otherwise for 6
+        atEdge = i == 0 or i + run == len(data)
+        if run >= 4 and (atEdge or run >= 6):
+            run -= run % 2
+            if codeSet != "C":
+                values.append(START_C if codeSet is None else CODE_C)
+                codeSet = "C"
+            for j in range(i, i + run, 2):
+                values.append(int(data[j:j + 2]))
+            i += run
+            continue
+        if codeSet != "B":
+            values.append(START_B if codeSet is None else CODE_B)
+            codeSet = "B"
+        if not " " <= data[i] <= "\x7F":
+            raise ValueError("Code 128 (code set B) can not encode %r" % data[i])
+        values.append(ord(data[i]) - 32)
+        i += 1
+    if not values:
+        raise ValueError("No data")
+    check = (values[0] + sum([ i * v for i, v in enumerate(values) ])) % 103
+    return values + [ check ]
+
+def code128(data):
+    """Modules of a Code 128 of data"""
+    return "".join([ _CODE128_MODULES[v] for v in code128Values(data) ]) + _CODE128_STOP_MODULES
+
+def itf(digits):
+    """Modules of an ITF (interleaved 2 of 5) of digits. A 0 is added in front of an odd number of digits."""
+    if not digits.isdigit():
+        raise ValueError("ITF takes digits, not %r" % digits)
+    if len(digits) % 2:
+        digits = "0" + digits
+    widths = [ 1, 1, 1, 1 ]
+    for i in range(0, len(digits), 2):
+        for bar, space in zip(_ITF_DIGITS[int(digits[i])], _ITF_DIGITS[int(digits[i + 1])]):
+            widths.append(ITF_WIDE if bar == "w" else 1)
+            widths.append(ITF_WIDE if space == "w" else 1)
+    widths += [ ITF_WIDE, 1, 1 ]
+    return widthsToModules(widths)
+
+ENCODERS = { EAN13: ean13, CODE128: code128, ITF: itf }
+
+# GS k function numbers (the form with a length byte)
+NATIVE = { EAN13: 67, CODE128: 73, ITF: 70 }
+
+def nativeCommands(data, symbology, height=80, moduleWidth=2, hri=True):
+    """The printer commands for a barcode made by the printer (GS h, GS w, GS H and GS k)"""
+    # Let the encoder check the data, so the printer gets no data it would refuse or print wrongly
+    ENCODERS[symbology](data)
+    if symbology == CODE128:
+        # Code set B; a "{" in the data is written as "{{"
+        data = "{B" + data.replace("{", "{{")
+    elif symbology == EAN13:
+        data = data[:12]
+    elif symbology == ITF and len(data) % 2:
+        # The printer only takes an even number of digits; add a 0 in front as itf() does
+        data = "0" + data
+    return ("\x1D\x68" + chr(height) + "\x1D\x77" + chr(moduleWidth) + "\x1D\x48" + ("\x02" if hri else "\x00")
+        + "\x1D\x6B" + chr(NATIVE[symbology]) + chr(len(data)) + data)
+
+def rowBytes(modules, moduleWidth, offset):
+    """A row of dots of the modules, moduleWidth dots per module, packed 8 dots per byte from offset dots
+    from the left (rounded up to whole bytes)"""
+    row = "".join([ m * moduleWidth for m in modules ])
+    row = "0" * offset + row
+    row += "0" * (-len(row) % 8)
+    return "".join([ chr(int(row[i:i + 8], 2)) for i in range(0, len(row), 8) ])
+
+def rasterCommands(modules, height, moduleWidth, offset):
+    """A barcode as a raster bit image (GS v 0): the same row height times"""
+    row = rowBytes(modules, moduleWidth, offset)
+    return ("\x1D\x76\x30\x00" + chr(len(row) % 256) + chr(len(row) // 256) + chr(height % 256) + chr(height // 256)
+        + row * height)
+
+def bandCommands(modules, height, moduleWidth, offset):
+    """A barcode as 24 dot bit image bands (ESC *), each column all black or all white"""
+    columns = "\x00\x00\x00" * offset + "".join([ ("\xFF\xFF\xFF" if m == "1" else "\x00\x00\x00") * moduleWidth for m in modules ])
+    n = len(columns) // 3
+    band = "\x1B\x2A\x21" + chr(n % 256) + chr(n // 256) + columns + "\n"
+    return band * (-(-height // 24))
+
+def commands(data, symbology=CODE128, native=False, raster=False, paperDots=568, height=80, moduleWidth=2,
+    hri=True, align="center"):
+    """The printer commands for a barcode of data: GS k if native, otherwise a raster image (GS v 0) if raster or
+    else bit image bands, made straight from the modules. paperDots is the width of the paper in dots.
+    If hri is set the data is printed below the barcode."""
+    if symbology not in ENCODERS:
+        raise ValueError("Unknown symbology %r (known: %s)" % (symbology, ", ".join(sorted(ENCODERS))))
+    justify = "\x1B\x61" + { "left": "\x00", "center": "\x01", "right": "\x02" }[align]
+    if native:
+        return justify + nativeCommands(data, symbology, height, moduleWidth, hri) + "\x1B\x61\x00"
+    modules = ENCODERS[symbology](data)
+    blanks = max(paperDots - len(modules) * moduleWidth, 0)
+    offset = { "left": 0, "center": blanks // 2, "right": blanks }[align]
+    if raster:
+        out = rasterCommands(modules, height, moduleWidth, offset)
+    else:
+        out = bandCommands(modules, height, moduleWidth, offset)
+    if hri:
+        out += justify + data + "\n\x1B\x61\x00"
+    return out
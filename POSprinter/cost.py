@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Estimation of how long a print job takes to transmit and to print"""
+from .escpos import iterCommands
+
+MM_PER_INCH = 25.4
+# The height of a barcode (GS h) after the printer is reset, in dots
+BARCODE_HEIGHT = 162
+
+def bitsPerByte(bytesize=8, parity="N", stopbits=1):
+    """Number of bits on the serial line per byte: start bit, data bits, parity bit and stop bits"""
+    return 1 + bytesize + (0 if parity == "N" else 1) + stopbits
+
+
+class CostModel:
+    """Estimate the time a job takes to transmit at the serial settings and to print at the feed speed of the printer.
+    feedSpeed is the paper feed speed of the printer when printing, in mm per second.
+    motionUnits are the horizontal and vertical motion units of the printer in units per inch (see POSprinter).
+    cutterDistance is the paper (in mm) fed by a feed and cut (GS V A/B) to get the last printed line past the
+    cutter; by default the 6 line feeds that profiles send before a plain cut (see profiles.Profile.cutFeed).
+    The transmit time is the theoretical time at the baud rate divided by efficiency, which is 1.0 until the model
+    is calibrated with measured throughput (see calibrate)."""
+    def __init__(self, baudrate=9600, bytesize=8, parity="N", stopbits=1, feedSpeed=100.0, motionUnits=(180, 180),
+        cutterDistance=MM_PER_INCH):
+        self.baudrate = baudrate
+        self.bitsPerByte = bitsPerByte(bytesize, parity, stopbits)
+        self.feedSpeed = feedSpeed
+        self.motionUnits = motionUnits
+        self.cutterDistance = cutterDistance
+        self.efficiency = 1.0
+
+    @classmethod
+    def fromPrinter(cls, printer, feedSpeed=None):
+        """A model for the serial settings and motion units of a POSprinter. The feed speed defaults to the one
+        of its profile."""
+        if feedSpeed is None:
+            feedSpeed = printer.profile.feedSpeed
+        settings = printer.portSettings
+        return cls(settings["baudrate"], settings["bytesize"], settings["parity"], settings["stopbits"],
+            feedSpeed, printer.motionUnits)
+
+    @property
+    def bytesPerSecond(self):
+        """The expected throughput of the serial line"""
+        return self.baudrate / float(self.bitsPerByte) * self.efficiency
+
+    def wireTime(self, nbytes):
+        """Seconds it takes to transmit nbytes"""
+        return nbytes / self.bytesPerSecond
+
+    def paperLength(self, data):
+        """The length of paper (in mm) fed when printing data: line feeds, ESC J / ESC d feeds, raster images,
+        barcodes (GS k), pages (the height of the ESC W print area, fed when FF prints the page) and feed and cut
+        (GS V A/B)"""
+        unit = MM_PER_INCH / self.motionUnits[1]
+        dot = MM_PER_INCH / 180
+        # The default line spacing is 1/6 inch
+        lineSpacing = MM_PER_INCH / 6
+        barcodeHeight = BARCODE_HEIGHT
+        hriLines = 0
+        # The height of the print area of page mode (mm), or None in standard mode
+        page = None
+        pageHeight = 0.0
+        length = 0.0
+        for command in iterCommands(data):
+            name = command.name
+            if page is not None:
+                # Page mode only moves within the page, which is fed when it is printed
+                if name == "ESC W":
+                    pageHeight = (command.params[6] + command.params[7] * 256) * unit
+                elif name == "FF":
+                    length += pageHeight
+                    page = None
+                elif name in ("ESC S", "ESC @"):
+                    page = None
+                continue
+            if name == "ESC L":
+                page = True
+            elif name == "ESC @":
+                lineSpacing = MM_PER_INCH / 6
+                barcodeHeight = BARCODE_HEIGHT
+                hriLines = 0
+            elif name == "GS h":
+                barcodeHeight = command.params[0]
+            elif name == "GS H":
+                # HRI characters above (1), below (2) or both (3), a line each
+                hriLines = { 1: 1, 2: 1, 3: 2 }.get(command.params[0] % 48, 0)
+            elif name == "GS k":
+                length += barcodeHeight * dot + hriLines * lineSpacing
+            elif name == "GS V" and command.params[0] in (65, 66):
+                # Feed to the cutter and n more units, then cut
+                length += self.cutterDistance + command.params[1] * unit
+            elif name == "LF":
+                length += lineSpacing
+            elif name == "ESC J":
+                length += command.params[0] * unit
+            elif name == "ESC d":
+                length += command.params[0] * lineSpacing
+            elif name == "ESC 3":
+                lineSpacing = command.params[0] * unit
+            elif name == "ESC 2":
+                lineSpacing = MM_PER_INCH / 6
+            elif name == "GS v":
+                # Raster images are 180 dpi vertically unless printed with double height
+                dots = command.params[4] + command.params[5] * 256
+                length += dots * MM_PER_INCH / 180 * (2 if command.params[1] & 2 else 1)
+        return length
+
+    def printTime(self, data):
+        """Seconds it takes to print data"""
+        return self.paperLength(data) / self.feedSpeed
+
+    def estimate(self, job):
+        """Estimate a job (a job.Job or a string of printer commands). Returns a dict with the number of bytes, the
+        transmit time, the print time and the total time in seconds. The printer prints while it receives, so the
+        total is the longer of the two."""
+        data = getattr(job, "data", job)
+        wire = self.wireTime(len(data))
+        printing = self.printTime(data)
+        return { "bytes": len(data), "wireTime": wire, "printTime": printing, "time": max(wire, printing),
+            "paperLength": printing * self.feedSpeed }
+
+    def calibrate(self, nbytes, seconds):
+        """Adjust the transmit time estimates to a measured throughput of nbytes in seconds
+        (e.g. scheduler.SendScheduler.bytesSent and busyTime)"""
+        if nbytes <= 0 or seconds <= 0:
+            raise ValueError("Nothing to calibrate with: %s bytes in %s seconds" % (nbytes, seconds))
+        theoretical = self.baudrate / float(self.bitsPerByte)
+        self.efficiency = min(1.0, (nbytes / float(seconds)) / theoretical)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Conversion of photos and logos to the black/white (1 bit) images printed by POSprinter"""
+from PIL import Image, ImageChops
+
+METHODS = [ "threshold", "bayer", "floyd-steinberg" ]
+
+def bayerMatrix(n):
+    """The n x n (n is a power of two) Bayer index matrix as a list of rows"""
+    if n == 1:
+        return [[0]]
+    half = bayerMatrix(n // 2)
+    matrix = []
+    for offsets in ((0, 2), (3, 1)):
+        for row in half:
+            matrix.append([ 4 * v + offsets[0] for v in row ] + [ 4 * v + offsets[1] for v in row ])
+    return matrix
+
+
+def _diffuse(img, carry=None):
+    """Floyd-Steinberg dithering of the greyscale image img, continuing with carry, the error diffused into its
+    first row by the rows above (None at the top of an image). Returns the 1 bit image and the error for the rows
+    below it."""
+    width, height = img.size
+    data = list(img.getdata())
+    # The error of each pixel of the next row, with a pixel to spare on either side
+    below = carry or [ 0.0 ] * (width + 2)
+    out = []
+    for y in range(height):
+        current = below
+        below = [ 0.0 ] * (width + 2)
+        for x in range(width):
+            v = data[y * width + x] + current[x + 1]
+            black = v < 128
+            out.append(0 if black else 255)
+            e = v if black else v - 255
+            current[x + 2] += e * 7 / 16
+            below[x] += e * 3 / 16
+            below[x + 1] += e * 5 / 16
+            below[x + 2] += e / 16
+    result = Image.new("1", img.size)
+    result.putdata(out)
+    return result, below
+
+
+class Pipeline:
+    """Convert an image to 1 bit colour depth in a fixed order of operations:
+    greyscale, rotate, resize, gamma/contrast adjustment and finally threshold or dithering.
+    All steps work on the whole image at once (lookup tables and PIL channel operations); processBands converts
+    an image streamed band by band.
+    method may be set to "threshold", "bayer" (ordered dithering) or "floyd-steinberg" (error diffusion).
+    threshold is the grey level (0-255) below which a pixel is printed black. It also shifts the bayer pattern.
+    gamma above 1.0 darkens mid tones, contrast above 1.0 increases the contrast around the middle grey level.
+    bayerSize is the size of the ordered dithering pattern (2, 4 or 8).
+    Processed images may be kept in memory by passing a key to process() (see clearCache())."""
+    def __init__(self, method="floyd-steinberg", threshold=128, gamma=1.0, contrast=1.0, bayerSize=4):
+        if method not in METHODS:
+            raise ValueError("method must be part of %s" % str(METHODS))
+        if bayerSize not in (2, 4, 8):
+            raise ValueError("bayerSize must be 2, 4 or 8")
+        self.method = method
+        self.threshold = threshold
+        self.gamma = gamma
+        self.contrast = contrast
+        self.bayerSize = bayerSize
+        self._toneTable = self._computeToneTable()
+        self._bayerRows = self._computeBayerRows()
+        self._bayerMap = None
+        self.cache = {}
+
+    def _computeToneTable(self):
+        """Lookup table for gamma and contrast adjustment, or None if the image is left untouched."""
+        if self.gamma == 1.0 and self.contrast == 1.0:
+            return None
+        table = []
+        for v in range(256):
+            v = 255.0 * (v / 255.0) ** self.gamma
+            v = 128 + (v - 128) * self.contrast
+            table.append(min(255, max(0, int(round(v)))))
+        return table
+
+    def _computeBayerRows(self):
+        """One row of threshold values per row of the bayer pattern (as strings of bytes)."""
+        n = self.bayerSize
+        rows = []
+        for row in bayerMatrix(n):
+            values = [ int((v + 0.5) * 256 / (n * n)) + self.threshold - 128 for v in row ]
+            rows.append("".join([ chr(min(255, max(0, v))) for v in values ]))
+        return rows
+
+    def _bayerImage(self, size, offset=0):
+        """The bayer threshold pattern tiled to size, starting at row offset of the pattern (kept for the next image
+        of the same size and offset)."""
+        if self._bayerMap is None or self._bayerMap[0] != (tuple(size), offset):
+            width, height = size
+            n = self.bayerSize
+            rows = [ (row * (width // n + 1))[:width] for row in self._bayerRows ]
+            rows = rows[offset:] + rows[:offset]
+            data = "".join(rows) * (height // n + 1)
+            self._bayerMap = (tuple(size), offset), Image.frombytes("L", size, data[:width * height])
+        return self._bayerMap[1]
+
+    def process(self, img, size=None, rotate=None, key=None):
+        """Return img converted to a 1 bit image. size is the final (width, height) after rotation.
+        If key is set the result is cached under key (together with size and rotate) and reused."""
+        if key is not None:
+            cacheKey = (key, size and tuple(size), rotate)
+            if cacheKey in self.cache:
+                return self.cache[cacheKey]
+        img = self._grey(img, size, rotate)
+        if self.method == "threshold":
+            img = img.point([ 0 if v < self.threshold else 255 for v in range(256) ], "1")
+        elif self.method == "bayer":
+            img = self._bayer(img)
+        else:
+            img = self._shift(img).convert("1", dither=Image.FLOYDSTEINBERG)
+        if key is not None:
+            self.cache[cacheKey] = img
+        return img
+
+    def processBands(self, bands):
+        """Convert the bands of an image (full width images, from the top) to 1 bit images one by one, as process()
+        converts a whole image but without rotating or resizing. All methods are supported and leave no seams
+        between the bands: the bayer pattern continues from the rows of the bands above, and Floyd-Steinberg
+        carries the error of the last row of a band into the next band. The streamed Floyd-Steinberg is done in
+        Python, not by PIL, so it is slower and may differ slightly from process()."""
+        top = 0
+        carry = None
+        for band in bands:
+            if self.method == "threshold":
+                yield self.process(band)
+            elif self.method == "bayer":
+                yield self._bayer(self._grey(band), top % self.bayerSize)
+            else:
+                band, carry = _diffuse(self._shift(self._grey(band)), carry)
+                yield band
+            top += band.size[1]
+
+    def _grey(self, img, size=None, rotate=None):
+        """img as a greyscale image, rotated, resized and adjusted by the tone table"""
+        if img.mode in ("RGBA", "LA", "P") :
+            # Put transparent parts on white paper
+            img = img.convert("RGBA")
+            background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+            background.paste(img, mask=img.split()[3])
+            img = background
+        img = img.convert("L")
+        if rotate:
+            img = img.rotate(rotate, expand=True)
+        if size and tuple(size) != img.size:
+            img = img.resize(size, Image.ANTIALIAS)
+        if self._toneTable:
+            img = img.point(self._toneTable)
+        return img
+
+    def _bayer(self, img, offset=0):
+        # Black where the pixel is darker than the pattern: (pixel - pattern + 128) < 128
+        img = ImageChops.subtract(img, self._bayerImage(img.size, offset), 1.0, 128)
+        return img.point([ 0 if v < 128 else 255 for v in range(256) ], "1")
+
+    def _shift(self, img):
+        """Move threshold to the middle grey level, where error diffusion divides black from white"""
+        if self.threshold != 128:
+            img = img.point([ min(255, max(0, v + 128 - self.threshold)) for v in range(256) ])
+        return img
+
+    def clearCache(self):
+        """Forget all images cached by process()"""
+        self.cache = {}
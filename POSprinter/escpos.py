@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Splitting of an ESC/POS byte stream (as written by POSprinter) into commands and text"""
+
+ESC = "\x1B"
+GS = "\x1D"
+DLE = "\x10"
+FS = "\x1C"
+
+# Control characters without parameters
+CONTROLS = { "\x0A": "LF", "\x0D": "CR", "\x09": "HT", "\x0C": "FF", "\x18": "CAN" }
+
+# Number of parameter bytes of the commands with a fixed length: { prefix: { command character: length } }
+FIXED = {
+    ESC: { "@": 0, "!": 1, "-": 1, "2": 0, "3": 1, "a": 1, "d": 1, "E": 1, "G": 1, "J": 1, "K": 1, "M": 1,
+        "R": 1, "t": 1, "$": 2, "\\": 2, "{": 1, "V": 1, "L": 0, "S": 0, "T": 1, "W": 8, "c": 2, "p": 3,
+        "r": 1, "U": 1, " ": 1, "%": 1, "?": 1, "i": 0, "m": 0, "=": 1 },
+    GS: { "L": 2, "W": 2, "h": 1, "w": 1, "H": 1, "f": 1, "a": 1, "r": 1, "P": 2, "!": 1, "B": 1,
+        "$": 2, "\\": 2, ":": 0, "^": 3, "/": 1, "I": 1 },
+    DLE: { "\x04": 1, "\x05": 1, "\x14": 3 },
+    FS: { ".": 0, "&": 0, "p": 2 },
+    }
+
+class Command:
+    """A single command: name (e.g. "ESC J", "LF" or "text" for printable text), the parameter bytes as a list of
+    integers and the payload (data following the parameters, e.g. bit image data) as a string."""
+    def __init__(self, name, params=(), payload=""):
+        self.name = name
+        self.params = list(params)
+        self.payload = payload
+
+    def __repr__(self):
+        if self.name == "text":
+            return "Command(text %r)" % self.payload
+        return "Command(%s %s%s)" % (self.name, self.params, " + %d bytes" % len(self.payload) if self.payload else "")
+
+def _name(prefix, char):
+    return "%s %s" % ({ ESC: "ESC", GS: "GS", DLE: "DLE", FS: "FS" }[prefix], char if " " < char < "\x7F" else "0x%02X" % ord(char))
+
+def _variable(data, i, prefix, char):
+    """Parameters and payload of the variable length commands starting at i (after prefix and char).
+    Returns (params, payload, next position) or None if not a known variable length command."""
+    if prefix == ESC and char == "*":
+        # ESC * m nL nH d1...dk
+        m, nL, nH = [ ord(c) for c in data[i:i + 3] ]
+        columns = nL + nH * 256
+        size = columns * (3 if m in (32, 33) else 1)
+        return [ m, nL, nH ], data[i + 3:i + 3 + size], i + 3 + size
+    if prefix == GS and char == "v":
+        # GS v 0 m xL xH yL yH d1...dk
+        m, xL, xH, yL, yH = [ ord(c) for c in data[i + 1:i + 6] ]
+        size = (xL + xH * 256) * (yL + yH * 256)
+        return [ ord(data[i]), m, xL, xH, yL, yH ], data[i + 6:i + 6 + size], i + 6 + size
+    if prefix == GS and char == "V":
+        # GS V m [n]
+        m = ord(data[i])
+        if m in (65, 66, 97, 98, 103, 104):
+            return [ m, ord(data[i + 1]) ], "", i + 2
+        return [ m ], "", i + 1
+    if prefix == GS and char == "k":
+        # GS k m d1...dk NUL (m <= 6) or GS k m n d1...dn
+        m = ord(data[i])
+        if m <= 6:
+            end = data.index("\x00", i + 1)
+            return [ m ], data[i + 1:end], end + 1
+        n = ord(data[i + 1])
+        return [ m, n ], data[i + 2:i + 2 + n], i + 2 + n
+    if prefix == GS and char in "(8":
+        # GS ( fn pL pH ... and GS 8 L p1 p2 p3 p4 ...
+        if char == "(":
+            fn = ord(data[i])
+            size = ord(data[i + 1]) + ord(data[i + 2]) * 256
+            return [ fn, ord(data[i + 1]), ord(data[i + 2]) ], data[i + 3:i + 3 + size], i + 3 + size
+        fn = ord(data[i])
+        p = [ ord(c) for c in data[i + 1:i + 5] ]
+        size = p[0] + p[1] * 256 + p[2] * 65536 + p[3] * 16777216
+        return [ fn ] + p, data[i + 5:i + 5 + size], i + 5 + size
+    if prefix == GS and char == "*":
+        # GS * x y d1...d(x*y*8)
+        x, y = ord(data[i]), ord(data[i + 1])
+        size = x * y * 8
+        return [ x, y ], data[i + 2:i + 2 + size], i + 2 + size
+    return None
+
+def iterCommands(data):
+    """Generate the commands (Command objects) of data. Runs of printable text are returned as
+    Command("text", payload=...). Unknown commands are returned with the name "unknown" and the prefix as payload."""
+    for command, end in _iterSpans(data):
+        yield command
+
+def splitCommands(data, size):
+    """Split data into pieces of at most size bytes without splitting a command. Text may be split anywhere.
+    A command longer than size (e.g. a large raster image) is a piece of its own."""
+    if len(data) <= size:
+        return [ data ]
+    pieces = []
+    # Start of the current piece and of the command being looked at
+    start = 0
+    commandStart = 0
+    for command, end in _iterSpans(data):
+        if end - start > size:
+            if command.name == "text":
+                while end - start > size:
+                    pieces.append(data[start:start + size])
+                    start += size
+            else:
+                if commandStart > start:
+                    pieces.append(data[start:commandStart])
+                    start = commandStart
+                if end - start > size:
+                    pieces.append(data[start:end])
+                    start = end
+        commandStart = end
+    if start < len(data):
+        pieces.append(data[start:])
+    return pieces
+
+def _iterSpans(data):
+    """Generate the commands of data (see iterCommands), each with the position after it"""
+    i = 0
+    text = 0
+    length = len(data)
+    while i < length:
+        c = data[i]
+        if c not in CONTROLS and c not in FIXED:
+            i += 1
+            continue
+        if text < i:
+            yield Command("text", payload=data[text:i]), i
+        if c in CONTROLS:
+            i += 1
+            yield Command(CONTROLS[c]), i
+        elif i + 1 < length:
+            char = data[i + 1]
+            fixed = FIXED[c].get(char)
+            if fixed is not None:
+                i += 2 + fixed
+                yield Command(_name(c, char), [ ord(p) for p in data[i - fixed:i] ]), i
+            else:
+                variable = None
+                try:
+                    variable = _variable(data, i + 2, c, char)
+                except (ValueError, IndexError):
+                    pass
+                if variable is None:
+                    i += 1
+                    yield Command("unknown", payload=c), i
+                else:
+                    params, payload, i = variable
+                    yield Command(_name(c, char), params, payload), i
+        else:
+            i += 1
+            yield Command("unknown", payload=c), i
+        text = i
+    if text < length:
+        yield Command("text", payload=data[text:]), length
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""A fake serial printer on a pseudo terminal, for trying out POSprinter without a printer (or paper)"""
+import os
+import threading
+import time
+import tty
+
+from .status import STATUS_FLAGS, ASB_FLAGS
+
+class FakePrinter:
+    """A printer answering real-time status requests (DLE EOT n) and sending automatic status back (GS a n)
+    on a pseudo terminal. Use port as the port of a POSprinter:
+        fake = FakePrinter()
+        printer = POSprinter(port=fake.port)
+    Everything else received is kept in data. Change the status with set(), e.g. set(paperOut=True).
+    If drainRate is set, the printer takes that many bytes per second (like a printer printing)."""
+    def __init__(self, drainRate=None):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.drainRate = drainRate
+        self.status = {}
+        self.asb = False
+        self.data = ""
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def set(self, **flags):
+        """Change status flags (see status.STATUS_FLAGS). An ASB is sent if enabled."""
+        with self._lock:
+            self.status.update(flags)
+            if self.asb:
+                os.write(self.master, self._asb())
+
+    def close(self):
+        self._running = False
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _statusByte(self, n):
+        byte = 0x12
+        for name, mask in STATUS_FLAGS[n]:
+            if self.status.get(name):
+                byte |= mask
+        return chr(byte)
+
+    def _asb(self):
+        data = ""
+        for i, byteFlags in enumerate(ASB_FLAGS):
+            byte = 0x10 if i == 0 else 0x00
+            for name, mask in byteFlags:
+                if self.status.get(name):
+                    byte |= mask
+            data += chr(byte)
+        return data
+
+    def _run(self):
+        pending = ""
+        while self._running:
+            try:
+                received = os.read(self.master, 4096)
+            except OSError:
+                return
+            if self.drainRate:
+                time.sleep(len(received) / float(self.drainRate))
+            pending += received
+            while True:
+                dle = pending.find("\x10\x04")
+                gsa = pending.find("\x1D\x61")
+                commands = [ i for i in (dle, gsa) if i >= 0 ]
+                if not commands or min(commands) + 2 >= len(pending):
+                    break
+                i = min(commands)
+                self.data += pending[:i]
+                with self._lock:
+                    if i == dle:
+                        os.write(self.master, self._statusByte(ord(pending[i + 2])))
+                    else:
+                        self.asb = ord(pending[i + 2]) != 0
+                        if self.asb:
+                            os.write(self.master, self._asb())
+                pending = pending[i + 3:]
+            # Keep a possibly incomplete command
+            keep = 2 if pending.endswith(("\x10\x04", "\x1D\x61")) else (1 if pending[-1:] in ("\x10", "\x1D") else 0)
+            self.data += pending[:len(pending) - keep]
+            pending = pending[len(pending) - keep:]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Rendering of receipts on all CPU cores. Rendering (text layout, image conversion and encoding, QR codes) is
+done in Python and holds the GIL, so a single process only uses one core. A RenderFarm compiles receipts in a pool
+of worker processes and hands back the compiled jobs in the order the receipts were submitted:
+    farm = RenderFarm(profile="tm-t88iii", fonts=[ (fontFile, 25) ])
+    receipt = [ ("printFontText", "The Shop", { "fontFile": fontFile }), ("printTable", columns, rows), ("lineFeedCut",) ]
+    for job, printer in zip(farm.imap(receipts), printers):
+        printer.send(job)
+    farm.close()
+A receipt is a list of elements (see stream.runElement). They are sent to the workers, so they must be picklable:
+tuples of method names and arguments, not lambdas."""
+import multiprocessing
+
+from .job import Job
+from .stream import runElement
+from .transport import BufferTransport
+
+# The printer of a worker process
+_printer = None
+
+def _initWorker(printerArgs, fonts):
+    global _printer
+    from .POSprinter import POSprinter
+    _printer = POSprinter(transport=BufferTransport(), **printerArgs)
+    _printer.warmup(fonts)
+
+def _render(receipt):
+    """The chunks of the compiled job of receipt. The chunks are handed back rather than the joined data, so the
+    job keeps its command boundaries (used by the scheduler and the resumable sender)."""
+    with _printer.job() as job:
+        for element in receipt:
+            runElement(_printer, element)
+    return job.chunks
+
+def _job(chunks):
+    job = Job()
+    job.chunks = chunks
+    return job
+
+
+class RenderFarm:
+    """A pool of processes (one per CPU core unless processes is given), each with a POSprinter made with
+    profile, charWidth and pxWidth, warmed up with fonts (a list of (fontFile, textSize)) when it starts."""
+    def __init__(self, processes=None, profile=None, charWidth=None, pxWidth=None, fonts=()):
+        printerArgs = dict(profile=profile, charWidth=charWidth, pxWidth=pxWidth)
+        self.pool = multiprocessing.Pool(processes, _initWorker, (printerArgs, list(fonts)))
+
+    def compile(self, receipts):
+        """Compile receipts. Returns a list of job.Job in the order of receipts."""
+        return [ _job(chunks) for chunks in self.pool.map(_render, receipts) ]
+
+    def imap(self, receipts, chunksize=1):
+        """Generate the compiled job.Job of each of receipts in order, as soon as it (and the ones before it)
+        are done. receipts may be an iterator."""
+        for chunks in self.pool.imap(_render, receipts, chunksize):
+            yield _job(chunks)
+
+    def send(self, receipts, printers):
+        """Compile receipts and send each to the POSprinter at the same position in printers, in order"""
+        for job, printer in zip(self.imap(receipts), printers):
+            printer.send(job)
+
+    def close(self):
+        """Stop the worker processes"""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
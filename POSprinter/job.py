@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Compiled print jobs"""
+
+class Job:
+    """The printer commands of a receipt (or anything else), compiled but not yet sent. A Job is written to like a
+    transport, so everything a POSprinter prints may be compiled into it (see POSprinter.job):
+        with printer.job() as job:
+            printer.write("Hello\\n")
+            printer.lineFeedCut()
+        printer.send(job)
+    chunks keeps the single writes, each of which is a whole printer command (or several)."""
+    def __init__(self, data=None):
+        self.chunks = []
+        if data:
+            self.chunks.append(data)
+
+    def write(self, data):
+        # Buffers (e.g. assets.Bundle slices) are kept as strings
+        self.chunks.append(str(data))
+        return len(data)
+
+    def close(self):
+        pass
+
+    @property
+    def data(self):
+        """All the printer commands of the job"""
+        return "".join(self.chunks)
+
+    @property
+    def byteCount(self):
+        """The exact number of bytes sent to the printer for this job"""
+        return sum([ len(chunk) for chunk in self.chunks ])
+
+    def estimate(self, model):
+        """Estimated bytes, transmit time and print time of the job (see cost.CostModel.estimate)"""
+        return model.estimate(self)
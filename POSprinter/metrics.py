@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Timing and byte counting of the stages of printing, per stage and per job.
+
+POSprinter records these stages when its metrics attribute is set (it is None by default, which costs nothing):
+    layout    - rendering of text by printFontText
+    convert   - conversion and scaling of images by printImgFromPILObject
+    encode    - encoding of image bands to printer commands (bytes are the size of the commands)
+    qr        - making QR codes with pyqrnative (see POSprinter.qrImage)
+    transmit  - writing to the serial port or transport (bytes are the bytes sent)
+    compile   - writing to a job or buffer within POSprinter.redirect (e.g. POSprinter.job and printStatic), which is
+                sent later; it is not counted as transmit
+Other stages may be timed by wrapping a function, e.g. loading a logo:
+    printer.metrics = Metrics(LoggingHook())
+    loadLogo = printer.metrics.wrap(loadLogo, "logo")
+    with printer.metrics.job("receipt 42"):
+        ...
+"""
+import contextlib
+import logging
+import time
+
+class Metrics:
+    """Collect the time spent and bytes produced per stage, in total and for the current job,
+    and pass every measurement on to the hooks (see LoggingHook, CounterHook and CallbackHook)."""
+    def __init__(self, *hooks):
+        self.hooks = list(hooks)
+        # { stage: [ calls, seconds, bytes ] }
+        self.totals = {}
+        self.jobName = None
+        self.jobTotals = {}
+
+    def addHook(self, hook):
+        self.hooks.append(hook)
+
+    def record(self, stage, seconds=0.0, nbytes=0):
+        """Record one measurement of stage"""
+        for totals in (self.totals, self.jobTotals):
+            entry = totals.setdefault(stage, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += nbytes
+        for hook in self.hooks:
+            hook.record(self.jobName, stage, seconds, nbytes)
+
+    @contextlib.contextmanager
+    def stage(self, name, nbytes=0):
+        """Time the body of a with statement as stage name"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(name, time.time() - start, nbytes)
+
+    def wrap(self, func, stage):
+        """Return func timed as stage"""
+        def timed(*args, **kwargs):
+            with self.stage(stage):
+                return func(*args, **kwargs)
+        return timed
+
+    @contextlib.contextmanager
+    def job(self, name):
+        """Measurements within the body of a with statement belong to job name. When the job is done the hooks
+        get its totals."""
+        self.jobName = name
+        self.jobTotals = {}
+        try:
+            yield self.jobTotals
+        finally:
+            for hook in self.hooks:
+                hook.jobDone(name, self.jobTotals)
+            self.jobName = None
+
+
+class CallbackHook:
+    """Call record(job, stage, seconds, nbytes) for every measurement and jobDone(job, totals) for every job"""
+    def __init__(self, record=None, jobDone=None):
+        self._record = record
+        self._jobDone = jobDone
+
+    def record(self, job, stage, seconds, nbytes):
+        if self._record:
+            self._record(job, stage, seconds, nbytes)
+
+    def jobDone(self, job, totals):
+        if self._jobDone:
+            self._jobDone(job, totals)
+
+
+class LoggingHook:
+    """Log the totals of each job (and optionally every measurement) through the logging module"""
+    def __init__(self, logger="POSprinter", level=logging.INFO, everyMeasurement=False):
+        self.logger = logging.getLogger(logger)
+        self.level = level
+        self.everyMeasurement = everyMeasurement
+
+    def record(self, job, stage, seconds, nbytes):
+        if self.everyMeasurement:
+            self.logger.log(self.level, "job %s: %s %.6f s %d bytes", job, stage, seconds, nbytes)
+
+    def jobDone(self, job, totals):
+        self.logger.log(self.level, "job %s: %s", job, ", ".join([ "%s %d calls %.3f s %d bytes" % ((stage,) + tuple(totals[stage])) for stage in sorted(totals) ]))
+
+
+class CounterHook:
+    """Counters in the style of Prometheus: calls, seconds and bytes per stage, and the number of jobs.
+    exposition() returns them in the Prometheus text format."""
+    def __init__(self, prefix="posprinter"):
+        self.prefix = prefix
+        self.counters = {}
+        self.jobs = 0
+
+    def record(self, job, stage, seconds, nbytes):
+        for name, value in (("calls", 1), ("seconds", seconds), ("bytes", nbytes)):
+            key = (name, stage)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def jobDone(self, job, totals):
+        self.jobs += 1
+
+    def exposition(self):
+        lines = []
+        for name in ("calls", "seconds", "bytes"):
+            metric = "%s_stage_%s_total" % (self.prefix, name)
+            lines.append("# TYPE %s counter" % metric)
+            for (counter, stage), value in sorted(self.counters.items()):
+                if counter == name:
+                    lines.append('%s{stage="%s"} %s' % (metric, stage, value))
+        lines.append("# TYPE %s_jobs_total counter" % self.prefix)
+        lines.append("%s_jobs_total %d" % (self.prefix, self.jobs))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Composition of text, images and QR codes side by side. Everything else POSprinter prints goes down the paper one
+element after the other, so a QR code next to the totals costs its own bands and its own paper feed. A Page places
+the elements at (x, y) in high resolution dots (180 dpi) from the top left corner of the page:
+    with printer.page(200) as page:
+        page.text(0, 0, "Total")
+        page.text(0, 40, "12.00", fontFile=fontFile, textSize=40)
+        page.qr(400, 0, "http://www.sman.dk", moduleSize=4)
+If the printer profile supports page mode (ESC L) the elements are sent into the page buffer of the printer, which
+prints them in one pass (FF). Otherwise the page is composited into a single bitmap, which is printed with
+printBitmap. Text without a fontFile is printed in the printer font in page mode; the bitmap has to draw it with
+PIL's default font instead."""
+from .transport import BufferTransport
+
+# Select page mode
+PAGE_MODE = "\x1B\x4C"
+# Print the page and return to standard mode
+PRINT_PAGE = "\x0C"
+
+class Page:
+    """A page of the full paper width and height high resolution dots (see POSprinter.page). Text is drawn with
+    fontFile and textSize unless given for the element; fontFile None is the printer font."""
+    def __init__(self, printer, height, fontFile=None, textSize=24):
+        self.printer = printer
+        self.width = printer.pxWidth * 2
+        self.height = height
+        self.fontFile = fontFile
+        self.textSize = textSize
+        # (x, y, text or black/white PIL image)
+        self.elements = []
+
+    def text(self, x, y, text, fontFile=None, textSize=None, encoding="cp437"):
+        """Text at (x, y). With a font file the text is rendered to an image, so it is the same in both modes.
+        Text in the printer font is a single line; unicode text is encoded using encoding (see table.encode)."""
+        fontFile = fontFile or self.fontFile
+        if not fontFile:
+            from .table import encode, textWidth
+            # The printer font is 24 dots high and as wide as a character of the paper width
+            width = textWidth(text) * (self.width // self.printer.width)
+            if "\n" in text or x + width > self.width or y + 24 > self.height:
+                raise ValueError("Text at (%d, %d) of %dx24 dots does not fit on a single line of the page of %dx%d dots"
+                    % (x, y, width, self.width, self.height))
+            if isinstance(text, unicode):
+                text = encode(text, encoding)
+            self.elements.append((x, y, text))
+            return
+        from PIL import Image, ImageDraw
+        from .POSprinter import loadFont
+        font = loadFont(fontFile, textSize or self.textSize)
+        img = Image.new("1", font.getsize(text), 255)
+        ImageDraw.Draw(img).text((0, 0), text.decode("UTF-8") if isinstance(text, str) else text, font=font, fill=0)
+        self.image(x, y, img)
+
+    def image(self, x, y, img):
+        """A PIL image at (x, y), printed in its own size. Images which are not black/white are converted."""
+        if img.mode != "1":
+            img = img.convert("1")
+        if x + img.size[0] > self.width or y + img.size[1] > self.height:
+            raise ValueError("Image at (%d, %d) of %dx%d dots does not fit on the page of %dx%d dots"
+                % (x, y, img.size[0], img.size[1], self.width, self.height))
+        self.elements.append((x, y, img))
+
+    def qr(self, x, y, data, version=5, level="M", moduleSize=4):
+        """A QR code at (x, y) (see POSprinter.printQR). Its quiet zone is included."""
+        self.image(x, y, self.printer.qrImage(data, version, level, moduleSize))
+
+    def commands(self):
+        """The printer commands of the page: page mode if the profile of the printer supports it, otherwise a
+        single bitmap"""
+        if self.printer.profile.pageMode:
+            return self.pageModeCommands()
+        with self.printer.redirect(BufferTransport()) as buf:
+            self.printer.printBitmap(self.bitmap(), "high", "left")
+        return buf.getvalue()
+
+    def printPage(self):
+        """Send the page to the printer"""
+        self.printer.write(self.commands())
+
+    def pageModeCommands(self):
+        """The page in page mode (ESC L): the print area (ESC W) is the page, and each element is positioned
+        with ESC $ (x) and GS $ (y) and printed as bit image bands (ESC *) or text. Characters and bit images
+        are printed with their bottom at the vertical position."""
+        xUnits, yUnits = self.printer.motionUnits
+        area = [ 0, 0, self.width * xUnits // 180, self.height * yUnits // 180 ]
+        out = PAGE_MODE + "\x1B\x57" + "".join([ chr(n % 256) + chr(n // 256) for n in area ])
+        for x, y, element in self.elements:
+            if isinstance(element, basestring):
+                out += self._moveTo(x, y + 24) + element
+                continue
+            orientation = self.printer._orientation(element.size[0], element.size[1], None)
+            top = y
+            for band in self.printer._iterBandColumns(element.load(), orientation, 24):
+                end = len(band.rstrip("\x00"))
+                if end:
+                    # Skip the blank columns, like POSprinter._iterCompactBands
+                    first = (len(band) - len(band.lstrip("\x00"))) // 3
+                    last = -(-end // 3)
+                    n = last - first
+                    out += (self._moveTo(x + first, top + 24) + "\x1B\x2A\x21" + chr(n % 256) + chr(n // 256)
+                        + str(band[first * 3:last * 3]))
+                top += 24
+        return out + PRINT_PAGE
+
+    def _moveTo(self, x, y):
+        """Move to (x, y) in high resolution dots from the top left of the print area (ESC $ and GS $)"""
+        x = x * self.printer.motionUnits[0] // 180
+        y = y * self.printer.motionUnits[1] // 180
+        return "\x1B\x24" + chr(x % 256) + chr(x // 256) + "\x1D\x24" + chr(y % 256) + chr(y // 256)
+
+    def bitmap(self):
+        """The page as a single black/white PIL image of the full paper width"""
+        from PIL import Image, ImageDraw, ImageFont
+        img = Image.new("1", (self.width, self.height), 255)
+        draw = ImageDraw.Draw(img)
+        font = None
+        for x, y, element in self.elements:
+            if isinstance(element, basestring):
+                font = font or ImageFont.load_default()
+                # Centre the default font (11 dots high) in the 24 dot line of the printer font
+                draw.text((x, y + 6), element.decode("cp437", "replace"), font=font, fill=0)
+            else:
+                img.paste(element, (x, y))
+        return img
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Encoding and sending at the same time. Without it POSprinter encodes a band of an image, writes it, waits until
+the serial port has taken it and only then encodes the next band, so the serial line is idle while Python computes.
+A PipelinedTransport queues what is written and a writer thread sends it, so the next band is encoded while the
+previous one is on the line (see POSprinter.pipelined):
+    with printer.pipelined() as pipeline:
+        printer.printImgFromFile("logo.png")
+        printer.lineFeedCut()
+    print pipeline.underruns"""
+import Queue
+import threading
+
+class PipelinedTransport:
+    """Wrap a serial port (or another transport): write() puts the data in a queue of at most depth writes (each a
+    whole printer command, e.g. an image band) and returns at once unless the queue is full; a writer thread takes
+    the data from the queue and writes it to port in order.
+
+    If writing to the port fails, the data queued after it is dropped and the error is raised by the next write,
+    flush or close. bytesSent is the number of bytes written to the port, and underruns the number of times the
+    writer had sent everything and had to wait for the next data, i.e. the line went idle because encoding was
+    slower than sending."""
+    def __init__(self, port, depth=8):
+        self.port = port
+        self.queue = Queue.Queue(depth)
+        self.error = None
+        self.bytesSent = 0
+        self.underruns = 0
+        self.thread = threading.Thread(target=self._run, name="POSprinter pipeline")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write(self, data):
+        self._raise()
+        self.queue.put(str(data))
+        return len(data)
+
+    def flush(self):
+        """Wait until everything written has been written to the port"""
+        self.queue.join()
+        self._raise()
+        if hasattr(self.port, "flush"):
+            self.port.flush()
+
+    def close(self):
+        """Send everything written and stop the writer thread. The port is neither closed nor flushed, so a
+        scheduler.SendScheduler below may still hold part of it back (POSprinter.pipelined flushes it)."""
+        self.queue.put(None)
+        self.thread.join()
+        self._raise()
+
+    def _raise(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        sent = False
+        while True:
+            waited = sent and self.queue.empty()
+            data = self.queue.get()
+            try:
+                if data is None:
+                    return
+                if waited:
+                    self.underruns += 1
+                if self.error is None:
+                    self.port.write(data)
+                    self.bytesSent += len(data)
+                    sent = True
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
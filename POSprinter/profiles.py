@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Capabilities of printer models. A POSprinter made with profile="tm-t88iii" (or a Profile object) takes its paper
+width, motion units, image encoding, cut command etc. from the profile, so the fastest way of printing supported
+by the model is used. Arguments given to POSprinter explicitly (e.g. charWidth) override the profile.
+
+New models are added with register():
+    register(Profile("my-printer", charWidth=48, pxWidth=288, rasterImages=True, nativeQR=True))"""
+
+# Cut commands (GS V)
+FULL_CUT = "\x1D\x56\x00"
+# Feed the paper to the cutting position and cut, so no line feeds are needed before the cut
+FEED_FULL_CUT = "\x1D\x56\x41\x00"
+FEED_PARTIAL_CUT = "\x1D\x56\x42\x00"
+
+class Profile:
+    """The capabilities of a printer model:
+    charWidth       characters per line of the printer font
+    pxWidth         width of the paper in low resolution dots (half of the high resolution dots)
+    motionUnits     horizontal and vertical motion units (ESC $, ESC J, GS L) in units per inch
+    compactImages   bit images may be positioned with ESC $ and fed with ESC J (see POSprinter.iterImgBands)
+    rasterImages    raster bit images (GS v 0) are supported
+    nativeQR        QR codes are printed by the printer (GS ( k)
+    nativeBarcodes  EAN-13, Code 128 and ITF barcodes are printed by the printer (GS k)
+    pageMode        page mode (ESC L, ESC W) is supported
+    macroSize       size of the macro buffer (GS :) in bytes (None if macros are not supported)
+    cutCommand      the command cutting the paper
+    cutFeed         line feeds needed before cutCommand to get the printed text above the cutter
+    feedSpeed       paper feed speed when printing, in mm per second (see cost.CostModel)
+    bufferSize      size of the receive buffer in bytes (None if unknown; see scheduler.SendScheduler)
+    maxBaudrate     the highest baud rate of the serial interface (None if unknown)"""
+    def __init__(self, name, charWidth=44, pxWidth=284, motionUnits=(180, 180), compactImages=False,
+        rasterImages=False, nativeQR=False, nativeBarcodes=False, pageMode=False, macroSize=None, cutCommand=FULL_CUT, cutFeed=6,
+        feedSpeed=100.0, bufferSize=None, maxBaudrate=None):
+        self.name = name
+        self.charWidth = charWidth
+        self.pxWidth = pxWidth
+        self.motionUnits = motionUnits
+        self.compactImages = compactImages
+        self.rasterImages = rasterImages
+        self.nativeQR = nativeQR
+        self.nativeBarcodes = nativeBarcodes
+        self.pageMode = pageMode
+        self.macroSize = macroSize
+        self.cutCommand = cutCommand
+        self.cutFeed = cutFeed
+        self.feedSpeed = feedSpeed
+        self.bufferSize = bufferSize
+        self.maxBaudrate = maxBaudrate
+
+    def __repr__(self):
+        return "Profile(%r)" % self.name
+
+
+PROFILES = {}
+
+def register(profile):
+    """Add a profile (or replace the one with the same name)"""
+    PROFILES[profile.name] = profile
+    return profile
+
+def getProfile(profile):
+    """The profile named profile. A Profile object is returned as it is."""
+    if isinstance(profile, Profile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError("Unknown printer profile %r (known profiles: %s)" % (profile, ", ".join(sorted(PROFILES))))
+
+# What POSprinter has always done: only commands every ESC/POS printer understands
+DEFAULT = register(Profile("default"))
+register(Profile("ncr7197", charWidth=44, pxWidth=284, compactImages=True, rasterImages=True, nativeBarcodes=True,
+    cutCommand=FULL_CUT, cutFeed=6, bufferSize=4096, maxBaudrate=115200))
+# Vertical motion unit of the TM-T88III is 1/360 inch
+register(Profile("tm-t88iii", charWidth=42, pxWidth=256, motionUnits=(180, 360), compactImages=True,
+    rasterImages=True, nativeBarcodes=True, pageMode=True, macroSize=2048, cutCommand=FEED_PARTIAL_CUT, cutFeed=0,
+    feedSpeed=150.0, bufferSize=4096, maxBaudrate=38400))
+# Cheap 203 dpi printers; their motion unit is one dot, which is what (180, 180) gives
+register(Profile("generic80", charWidth=48, pxWidth=288, compactImages=True, rasterImages=True,
+    nativeBarcodes=True, cutCommand=FEED_PARTIAL_CUT, cutFeed=0))
+register(Profile("generic58", charWidth=32, pxWidth=192, compactImages=True, rasterImages=True,
+    nativeBarcodes=True, cutCommand=FEED_PARTIAL_CUT, cutFeed=0))
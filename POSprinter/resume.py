@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Sending of jobs that survives the serial port going away (e.g. a USB serial adapter being unplugged)"""
+import time
+
+from .scheduler import STATUS_REQUEST
+
+# Initialise the printer
+INITIALIZE = "\x1B\x40"
+# Feed the paper (ESC J) and set the left margin (GS L)
+FEED = "\x1B\x4A"
+LEFT_MARGIN = "\x1D\x4C"
+
+def _leadingMargin(chunk):
+    """The left margin command (GS L) among the commands at the start of chunk, or None. Image bands start with
+    paper feed and the left margin, so nothing in the image data is taken for a command."""
+    margin = None
+    i = 0
+    while True:
+        if chunk.startswith(FEED, i):
+            i += 3
+        elif chunk.startswith(LEFT_MARGIN, i):
+            margin = chunk[i:i + 4]
+            i += 4
+        else:
+            return margin
+
+class ResumableSender:
+    """Send a compiled job.Job to a POSprinter in checkpoints of whole chunks (printer commands, e.g. image bands)
+    of about checkpointBytes. After each checkpoint a real-time status request (DLE EOT 1) is sent; its reply means
+    that the printer has received everything before it. If the port fails (an IOError or OSError, which includes
+    serial.SerialException), it is reopened (see POSprinter.reopen) after backoff seconds, doubled after every
+    failed attempt up to maxBackoff, and the job continues from the last acknowledged checkpoint.
+    At most retries reopens are attempted in a row before the error is raised.
+    Only the checkpoint that was being sent is sent again, which may print part of it twice.
+    If the printer does not answer status requests within ackTimeout seconds, a checkpoint is taken as received
+    when it has left the port.
+
+    The printer may have received part of a command when the port failed, e.g. the header of a bit image (ESC * or
+    GS v 0) and some of its data, and would take the start of the resent checkpoint as the rest of it. So after a
+    failure as many NUL bytes as the checkpoint has are sent first, which finishes any command in it as blank
+    image data, followed by ESC @ to initialise the printer. The left margin (GS L) set by raster images before the
+    checkpoint is then set again. Everything else ESC @ resets is lost, i.e. what the job set by other commands
+    before the checkpoint: the character code table (ESC t), print modes (ESC !, ESC E, GS ! etc.), line spacing
+    and justification. The blank image data may feed some paper."""
+    def __init__(self, printer, checkpointBytes=1024, ackTimeout=2.0, retries=8, backoff=0.5, maxBackoff=30.0,
+        errors=(IOError, OSError)):
+        self.printer = printer
+        self.checkpointBytes = checkpointBytes
+        self.ackTimeout = ackTimeout
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.errors = errors
+        self.useStatus = True
+        # The number of NUL bytes to send before the next checkpoint after a failure (see _resync), or None
+        self._interrupted = None
+        # Number of reopens and bytes sent again by the last send
+        self.reopens = 0
+        self.resentBytes = 0
+
+    def checkpoints(self, job):
+        """The data of the job split into checkpoints at chunk boundaries"""
+        return [ data for data, state in self._split(job) ]
+
+    def _split(self, job):
+        """The checkpoints of the job, each with the commands that set the state in effect at its start"""
+        checkpoints = []
+        current = []
+        size = 0
+        margin = ""
+        state = ""
+        for chunk in job.chunks:
+            current.append(chunk)
+            size += len(chunk)
+            margin = _leadingMargin(chunk) or margin
+            if size >= self.checkpointBytes:
+                checkpoints.append(("".join(current), state))
+                current = []
+                size = 0
+                state = margin
+        if current:
+            checkpoints.append(("".join(current), state))
+        return checkpoints
+
+    def send(self, job):
+        """Send job. Returns the number of checkpoints sent."""
+        checkpoints = self._split(job)
+        self.reopens = 0
+        self.resentBytes = 0
+        done = 0
+        failures = 0
+        while done < len(checkpoints):
+            data, state = checkpoints[done]
+            try:
+                if self._interrupted is not None:
+                    self._resync(state)
+                self._sendCheckpoint(data)
+            except self.errors:
+                # The printer may be inside a command of this checkpoint (or of the padding still to be finished)
+                self._interrupted = max(len(data), self._interrupted or 0)
+                if failures >= self.retries:
+                    raise
+                time.sleep(min(self.backoff * 2 ** failures, self.maxBackoff))
+                failures += 1
+                self.resentBytes += len(data)
+                try:
+                    self.printer.reopen()
+                    self.reopens += 1
+                except self.errors:
+                    pass
+                continue
+            failures = 0
+            done += 1
+        return done
+
+    def _resync(self, state):
+        """Finish a command the printer may have received part of, initialise the printer and set state again"""
+        self.printer._transmit("\x00" * self._interrupted + INITIALIZE + state)
+        self._interrupted = None
+
+    def _sendCheckpoint(self, data):
+        port = self.printer.printer
+        if not self.useStatus:
+            self.printer._transmit(data)
+            if hasattr(port, "flush"):
+                port.flush()
+            return
+        monitor = getattr(self.printer, "statusMonitor", None)
+        if monitor is not None:
+            # Send what a scheduler holds back first, so the status request comes after all the data before it
+            self.printer.flush()
+            acked = monitor.awaitReply(monitor.request(data + STATUS_REQUEST), self.ackTimeout) is not None
+        else:
+            self.printer._transmit(data + STATUS_REQUEST)
+            acked = self._awaitAck(port)
+        if not acked:
+            # The printer does not answer status requests
+            self.useStatus = False
+            if hasattr(port, "flush"):
+                port.flush()
+
+    def _awaitAck(self, port):
+        """Wait for the reply to the status request. Returns False on timeout."""
+        if not hasattr(port, "read"):
+            return False
+        timeout = port.timeout
+        port.timeout = self.ackTimeout
+        try:
+            return bool(port.read(1))
+        finally:
+            port.timeout = timeout
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Sending large payloads (images) to a printer as fast as its receive buffer allows"""
+import time
+
+from .escpos import splitCommands
+
+# Real-time status request (DLE EOT 1, printer status)
+STATUS_REQUEST = "\x10\x04\x01"
+
+class SendScheduler:
+    """Wrap a serial port (or another transport) and send what is written in chunks, keeping the receive buffer of
+    the printer full without overrunning it. It is used as the transport of a POSprinter (see POSprinter.enableScheduler).
+    Each write is treated as a whole printer command and is never split by a status request. Writes larger than
+    maxChunk (at most window) are split at command boundaries (see escpos.splitCommands); a single command larger
+    than that is sent on its own once everything before it has been acknowledged.
+
+    If the port uses hardware (RTS/CTS) or software (XON/XOFF) flow control, the port blocks while the printer is
+    busy, and each chunk is simply drained (flush) before the next one is written.
+    Otherwise a real-time status request (DLE EOT 1) is sent after each chunk and its reply is taken as an
+    acknowledgement: at most window bytes (the size of the printer's receive buffer) are sent ahead of the last
+    acknowledgement. If the printer does not reply within ackTimeout seconds, acknowledgements are switched off and
+    the chunks are drained like with flow control.
+
+    The chunk size follows the observed rate at which the printer takes the data, so a chunk takes about
+    targetLatency seconds. bytesPerSecond is the throughput achieved so far.
+    reader is an optional status.StatusMonitor, for when something else is reading from the port: the status
+    requests are then sent with its request() and the replies waited for with its awaitReply()."""
+    def __init__(self, port, window=4096, chunkSize=256, minChunk=32, maxChunk=4096, targetLatency=0.1,
+        ackTimeout=2.0, useStatus=None, reader=None):
+        self.port = port
+        self.window = window
+        self.chunkSize = chunkSize
+        self.minChunk = minChunk
+        self.maxChunk = min(maxChunk, window)
+        self.targetLatency = targetLatency
+        self.ackTimeout = ackTimeout
+        if useStatus is None:
+            useStatus = not (getattr(port, "rtscts", False) or getattr(port, "xonxoff", False))
+        self.useStatus = useStatus
+        self.reader = reader
+        self.drainRate = None
+        self.bytesSent = 0
+        self.busyTime = 0.0
+        self._batch = []
+        self._batchLen = 0
+        # Chunks that have been sent but not acknowledged: list of (length, time sent)
+        self._unacked = []
+        self._lastAck = None
+
+    def write(self, data):
+        data = str(data)
+        for piece in splitCommands(data, self.maxChunk):
+            # A batch is never larger than maxChunk, unless it is a single large command
+            if self._batch and self._batchLen + len(piece) > self.maxChunk:
+                self._sendBatch()
+            self._batch.append(piece)
+            self._batchLen += len(piece)
+            if self._batchLen >= self.chunkSize:
+                self._sendBatch()
+        return len(data)
+
+    def flush(self):
+        """Send everything written so far and wait until the printer has taken it."""
+        if self._batch:
+            self._sendBatch()
+        while self._unacked:
+            self._awaitAck()
+        if hasattr(self.port, "flush"):
+            self.port.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.port.close()
+
+    @property
+    def bytesPerSecond(self):
+        """The throughput achieved so far (bytes per second while sending)"""
+        if not self.busyTime:
+            return None
+        return self.bytesSent / self.busyTime
+
+    def _sendBatch(self):
+        data = "".join(self._batch)
+        self._batch = []
+        self._batchLen = 0
+        while self.useStatus and self._unacked and sum([ u[0] for u in self._unacked ]) + len(data) > self.window:
+            self._awaitAck()
+        # Acknowledgements may have been given up while waiting
+        if self.useStatus:
+            if not self._unacked:
+                self._lastAck = time.time()
+            if self.reader is not None:
+                ticket = self.reader.request(data + STATUS_REQUEST)
+            else:
+                ticket = None
+                self.port.write(data + STATUS_REQUEST)
+            self._unacked.append((len(data), time.time(), ticket))
+        else:
+            start = time.time()
+            self.port.write(data)
+            self._drain(data, start)
+
+    def _drain(self, data, start):
+        """Wait until data has left the port and adapt to the time it took"""
+        if hasattr(self.port, "flush"):
+            self.port.flush()
+        self._account(len(data), time.time() - start)
+
+    def _awaitAck(self):
+        """Wait for the reply to the oldest status request"""
+        length, sent, ticket = self._unacked.pop(0)
+        if ticket is not None:
+            reply = self.reader.awaitReply(ticket, self.ackTimeout)
+        else:
+            timeout = self.port.timeout
+            self.port.timeout = self.ackTimeout
+            try:
+                reply = self.port.read(1) or None
+            finally:
+                self.port.timeout = timeout
+        now = time.time()
+        if reply is None:
+            # The printer does not answer status requests. Fall back to draining the port.
+            self.useStatus = False
+            for u in self._unacked:
+                if u[2] is not None:
+                    self.reader.cancel(u[2])
+            self._unacked = []
+            self._account(length, now - sent)
+            return
+        self._account(length, now - max(sent, self._lastAck))
+        self._lastAck = now
+
+    def _account(self, length, seconds):
+        """Record that length bytes were taken by the printer in seconds, and adapt the chunk size"""
+        self.bytesSent += length
+        self.busyTime += seconds
+        if seconds <= 0:
+            return
+        rate = length / seconds
+        if self.drainRate is None:
+            self.drainRate = rate
+        else:
+            self.drainRate = 0.7 * self.drainRate + 0.3 * rate
+        self.chunkSize = int(max(self.minChunk, min(self.maxChunk, self.drainRate * self.targetLatency)))
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""A print spooler, which owns the serial ports of the printers and prints jobs submitted by other processes
+over a Unix domain socket. Jobs are kept in a queue directory on disk until they are printed, so they survive
+a restart of the spooler. Each printer prints its jobs one at a time, in the order they were submitted.
+
+Start the spooler (printers are given as name=port or name=port:profile):
+    python -m POSprinter.spooler --socket /tmp/posprinter.sock --queue /var/spool/posprinter receipt=/dev/ttyUSB0
+Submit a job from any process:
+    with printer.job() as job:
+        ...
+    submit(job, "receipt", "/tmp/posprinter.sock")
+
+The protocol is a line "PRINT <printer> <bytes>" followed by the job, answered by "OK <job id>" once the job
+is on disk, or "ERROR <message>"."""
+import logging
+import optparse
+import os
+import socket
+import SocketServer
+import tempfile
+import threading
+
+SOCKET = "/tmp/posprinter.sock"
+
+log = logging.getLogger("POSprinter.spooler")
+
+class Spooler:
+    """Queue jobs on disk in queueDir and print them on printers, a dict of { name: POSprinter }.
+    Jobs are sent with a resume.ResumableSender (which gets senderOptions), so a printer whose port fails is
+    reopened and the job continues. If the sender gives up, the error is logged and the job is sent again from its
+    start after retryDelay seconds (which may print part of it twice); the jobs after it wait."""
+    def __init__(self, queueDir, printers, retryDelay=5.0, **senderOptions):
+        self.queueDir = queueDir
+        self.printers = printers
+        self.retryDelay = retryDelay
+        self.senderOptions = senderOptions
+        self._lock = threading.Lock()
+        self._conditions = {}
+        self._threads = []
+        self._running = False
+        self._sequence = 0
+        for name in printers:
+            directory = os.path.join(queueDir, name)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._conditions[name] = threading.Condition(self._lock)
+            # Continue numbering after the jobs left from the last run
+            for filename in self.pending(name):
+                self._sequence = max(self._sequence, int(filename.split(".")[0]))
+
+    def pending(self, name):
+        """File names of the queued jobs of printer name, oldest first"""
+        return sorted([ f for f in os.listdir(os.path.join(self.queueDir, name)) if f.endswith(".job") ])
+
+    def submit(self, name, data):
+        """Queue data (printer commands or a job.Job) for printer name. The job is on disk when this returns.
+        Returns the job id."""
+        if name not in self.printers:
+            raise ValueError("Unknown printer %r" % name)
+        data = getattr(data, "data", data)
+        directory = os.path.join(self.queueDir, name)
+        # Write to a temporary file and rename it, so a job is either completely queued or not at all
+        fd, tmp = tempfile.mkstemp(".tmp", "", directory)
+        f = os.fdopen(fd, "wb")
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+        # The id is given when the job is queued, so the jobs are printed in the order they were queued in
+        with self._lock:
+            self._sequence += 1
+            jobId = "%012d" % self._sequence
+            os.rename(tmp, os.path.join(directory, jobId + ".job"))
+            self._conditions[name].notify()
+        return jobId
+
+    def start(self):
+        """Start printing the queued jobs, a thread per printer"""
+        self._running = True
+        for name in self.printers:
+            thread = threading.Thread(target=self._run, args=(name,))
+            thread.setDaemon(True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop printing when the jobs being printed are done. Queued jobs stay on disk."""
+        with self._lock:
+            self._running = False
+            for condition in self._conditions.values():
+                condition.notifyAll()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self, name):
+        from .escpos import splitCommands
+        from .job import Job
+        from .resume import ResumableSender
+        printer = self.printers[name]
+        sender = ResumableSender(printer, **self.senderOptions)
+        directory = os.path.join(self.queueDir, name)
+        condition = self._conditions[name]
+        while True:
+            with self._lock:
+                jobs = self.pending(name)
+                while self._running and not jobs:
+                    condition.wait(1.0)
+                    jobs = self.pending(name)
+                if not self._running:
+                    return
+            filename = os.path.join(directory, jobs[0])
+            f = open(filename, "rb")
+            try:
+                data = f.read()
+            finally:
+                f.close()
+            # The queue file keeps only the bytes of the job; split them at command boundaries again, so the sender
+            # has checkpoints to continue from
+            job = Job()
+            job.chunks = splitCommands(data, sender.checkpointBytes)
+            # The whole job is sent before the next one, so jobs are never interleaved
+            try:
+                sender.send(job)
+                printer.flush()
+            except EnvironmentError, e:
+                log.error("Printer %s failed (%s), sending job %s again in %s seconds", name, e, jobs[0],
+                    self.retryDelay)
+                with self._lock:
+                    if self._running:
+                        condition.wait(self.retryDelay)
+                continue
+            os.remove(filename)
+
+    def serve(self, socketPath=SOCKET):
+        """Accept jobs on the Unix domain socket socketPath. Returns the server; call its serve_forever()."""
+        if os.path.exists(socketPath):
+            os.remove(socketPath)
+        server = SpoolerServer(socketPath, SpoolerHandler)
+        server.spooler = self
+        return server
+
+
+class SpoolerServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+class SpoolerHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            try:
+                command, name, size = line.split()
+                if command != "PRINT":
+                    raise ValueError("Unknown command %r" % command)
+                size = int(size)
+                data = self.rfile.read(size)
+                if len(data) != size:
+                    return
+                jobId = self.server.spooler.submit(name, data)
+            except ValueError, e:
+                self.wfile.write("ERROR %s\n" % e)
+                return
+            self.wfile.write("OK %s\n" % jobId)
+            self.wfile.flush()
+
+
+def submit(job, printer, socketPath=SOCKET):
+    """Submit job (a job.Job or a string of printer commands) to the spooler listening on socketPath, for its
+    printer named printer. Returns the job id when the job is queued."""
+    data = getattr(job, "data", job)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socketPath)
+        sock.sendall("PRINT %s %d\n" % (printer, len(data)) + data)
+        reply = sock.makefile("rb").readline().strip()
+    finally:
+        sock.close()
+    if not reply.startswith("OK "):
+        raise IOError("Spooler: %s" % (reply or "no reply"))
+    return reply[3:]
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options] name=port[:profile] ...")
+    parser.add_option("--socket", default=SOCKET, help="Unix domain socket (default %default)")
+    parser.add_option("--queue", default="/var/spool/posprinter", help="queue directory (default %default)")
+    parser.add_option("--baudrate", type="int", default=9600, help="baud rate of the printers (default %default)")
+    options, args = parser.parse_args()
+    if not args:
+        parser.error("no printers")
+    logging.basicConfig(format="%(asctime)s %(message)s")
+    from .POSprinter import POSprinter
+    printers = {}
+    for arg in args:
+        name, port = arg.split("=", 1)
+        profile = None
+        if ":" in port:
+            port, profile = port.split(":", 1)
+        printers[name] = POSprinter(port, options.baudrate, profile=profile)
+    spooler = Spooler(options.queue, printers).start()
+    server = spooler.serve(options.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        spooler.stop()
+        for printer in printers.values():
+            printer.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Real-time status of the printer (paper out, cover open, cutter errors etc.)
+Status is read with real-time status requests (DLE EOT n) and Automatic Status Back (ASB, GS a n)."""
+import collections
+import threading
+import time
+import Queue
+
+# Real-time status requests (DLE EOT n)
+PRINTER_STATUS = 1
+OFFLINE_STATUS = 2
+ERROR_STATUS = 3
+PAPER_STATUS = 4
+
+# Flags of the replies to DLE EOT n: { n: [ (name, mask), ... ] }. A flag is set if all bits of mask are set.
+STATUS_FLAGS = {
+    PRINTER_STATUS: [ ("drawerOpen", 0x04), ("offline", 0x08), ("waitingForRecovery", 0x20), ("feedButton", 0x40) ],
+    OFFLINE_STATUS: [ ("coverOpen", 0x04), ("paperFeeding", 0x08), ("paperOutStop", 0x20), ("error", 0x40) ],
+    ERROR_STATUS: [ ("recoverableError", 0x04), ("cutterError", 0x08), ("unrecoverableError", 0x20), ("autoRecoverableError", 0x40) ],
+    PAPER_STATUS: [ ("paperNearEnd", 0x0C), ("paperOut", 0x60) ],
+    }
+
+# Flags of the four bytes of an automatic status back
+ASB_FLAGS = [
+    [ ("drawerOpen", 0x04), ("offline", 0x08), ("coverOpen", 0x20), ("paperFeeding", 0x40) ],
+    [ ("recoverableError", 0x04), ("cutterError", 0x08), ("unrecoverableError", 0x20), ("autoRecoverableError", 0x40) ],
+    [ ("paperNearEnd", 0x03), ("paperOut", 0x0C) ],
+    [],
+    ]
+
+# Enable ASB for drawer, online/offline, error and paper sensor status
+ASB_ENABLE = "\x1D\x61\x0F"
+ASB_DISABLE = "\x1D\x61\x00"
+
+def statusRequest(n):
+    """The real-time status request for status n (DLE EOT n)"""
+    return "\x10\x04" + chr(n)
+
+def parseStatus(n, reply):
+    """The flags of a reply (one byte) to DLE EOT n as a dict"""
+    byte = ord(reply)
+    return dict([ (name, byte & mask == mask) for name, mask in STATUS_FLAGS[n] ])
+
+def parseASB(data):
+    """The flags of an automatic status back (four bytes) as a dict"""
+    flags = {}
+    for byte, byteFlags in zip(data, ASB_FLAGS):
+        for name, mask in byteFlags:
+            flags[name] = ord(byte) & mask == mask
+    return flags
+
+def isStatusReply(byte):
+    """Replies to DLE EOT n have bit 1 and 4 set and bit 0 and 7 cleared"""
+    return ord(byte) & 0x93 == 0x12
+
+def isASBStart(byte):
+    """The first byte of an ASB has bit 4 set and bit 0, 1 and 7 cleared"""
+    return ord(byte) & 0x93 == 0x10
+
+
+class StatusMonitor:
+    """Read the status of the printer on a background thread, so writing to the printer is never blocked.
+    port is the serial port of the printer. The monitor wraps the port and is used as the transport of a POSprinter
+    (see POSprinter.startStatusMonitor): everything written to the port goes through write() or request(), which
+    share a lock, so a status request is never sent in the middle of another command.
+    request() writes data ending with a status request and returns a ticket, which gets the reply
+    (see awaitReply). The printer answers status requests in the order they were sent, so each reply is given to the
+    oldest ticket still waiting.
+    Callbacks registered with on() are called (on the reader thread) when a status flag changes, e.g.
+    on("paperOut", callback) calls callback("paperOut", True) when the paper runs out and callback("paperOut", False)
+    when paper has been loaded. Callbacks registered for "status" are called with every change.
+    If asb is True the printer is told to send its status by itself whenever it changes (ASB).
+    If pollInterval is set, all four real-time statuses are requested that often (in seconds).
+    The flags last seen are in status."""
+    def __init__(self, port, asb=False, pollInterval=None, readTimeout=0.05):
+        self.port = port
+        self.asb = asb
+        self.pollInterval = pollInterval
+        self.readTimeout = readTimeout
+        self.status = {}
+        self.callbacks = {}
+        # Tickets of the status requests waiting for their reply, oldest first
+        self._waiting = collections.deque()
+        self._waitingLock = threading.Lock()
+        self._writeLock = threading.Lock()
+        self._running = False
+        self._threads = []
+
+    def on(self, event, callback):
+        """Call callback(event, value) when the flag event changes ("status" for all flags)"""
+        self.callbacks.setdefault(event, []).append(callback)
+
+    def start(self):
+        """Start the reader (and poller) thread"""
+        self._running = True
+        self.port.timeout = self.readTimeout
+        targets = [ self._read ]
+        if self.pollInterval:
+            targets.append(self._poll)
+        for target in targets:
+            thread = threading.Thread(target=target)
+            thread.setDaemon(True)
+            thread.start()
+            self._threads.append(thread)
+        if self.asb:
+            self.write(ASB_ENABLE)
+        return self
+
+    def stop(self):
+        """Stop the threads (and ASB)"""
+        if self.asb:
+            self.write(ASB_DISABLE)
+        self._running = False
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def write(self, data):
+        """Write data (whole printer commands) to the port"""
+        with self._writeLock:
+            return self.port.write(data)
+
+    def request(self, data):
+        """Write data, which ends with a real-time status request (DLE EOT n), to the port. Returns the ticket
+        to wait for the reply with (see awaitReply)."""
+        ticket = Queue.Queue(1)
+        with self._writeLock:
+            with self._waitingLock:
+                self._waiting.append(ticket)
+            self.port.write(data)
+        return ticket
+
+    def awaitReply(self, ticket, timeout):
+        """Wait for the reply to the status request of ticket (see request). Returns the reply byte or None on
+        timeout; the ticket then no longer waits for a reply."""
+        try:
+            return ticket.get(True, timeout)
+        except Queue.Empty:
+            self.cancel(ticket)
+            return None
+
+    def cancel(self, ticket):
+        """Stop waiting for the reply to the status request of ticket"""
+        with self._waitingLock:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+
+    def flush(self):
+        if hasattr(self.port, "flush"):
+            self.port.flush()
+
+    def open(self):
+        self.port.open()
+
+    def close(self):
+        """Close the port"""
+        self.port.close()
+
+    def query(self, n, timeout=1.0):
+        """Request real-time status n (e.g. PAPER_STATUS) and return its flags, or None on timeout"""
+        reply = self.awaitReply(self.request(statusRequest(n)), timeout)
+        if reply is None:
+            return None
+        flags = parseStatus(n, reply)
+        self._update(flags)
+        return flags
+
+    def queryAll(self, timeout=1.0):
+        """Request all four real-time statuses and return the flags, or None if the printer does not reply"""
+        flags = {}
+        for n in (PRINTER_STATUS, OFFLINE_STATUS, ERROR_STATUS, PAPER_STATUS):
+            reply = self.query(n, timeout)
+            if reply is None:
+                return None
+            flags.update(reply)
+        return flags
+
+    def isReady(self):
+        """True unless the last known status is an error, offline, paper out or cover open"""
+        for name in ("offline", "paperOut", "coverOpen", "error", "cutterError", "unrecoverableError", "autoRecoverableError"):
+            if self.status.get(name):
+                return False
+        return True
+
+    def _read(self):
+        asb = None
+        while self._running:
+            try:
+                byte = self.port.read(1)
+            except (EnvironmentError, ValueError):
+                # The port is closed, e.g. while it is reopened (see POSprinter.reopen)
+                time.sleep(self.readTimeout)
+                continue
+            if not byte:
+                continue
+            if asb is not None:
+                asb += byte
+                if len(asb) == 4:
+                    self._update(parseASB(asb))
+                    asb = None
+            elif self.asb and isASBStart(byte):
+                asb = byte
+            elif isStatusReply(byte):
+                with self._waitingLock:
+                    ticket = self._waiting.popleft() if self._waiting else None
+                # Replies nobody waits for (any more) are dropped
+                if ticket is not None:
+                    ticket.put(byte)
+
+    def _poll(self):
+        while self._running:
+            self.queryAll()
+            end = time.time() + self.pollInterval
+            while self._running and time.time() < end:
+                time.sleep(min(0.05, self.pollInterval))
+
+    def _update(self, flags):
+        """Store flags and call the callbacks of the flags that changed"""
+        changed = []
+        for name, value in flags.items():
+            if self.status.get(name, False) != value:
+                changed.append((name, value))
+            self.status[name] = value
+        for name, value in changed:
+            for callback in self.callbacks.get(name, []) + self.callbacks.get("status", []):
+                callback(name, value)
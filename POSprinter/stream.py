@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Streaming of long receipts (kitchen tickets, Z reports etc.) rendered from a template and an iterator of rows"""
+from .table import Table, encode
+from .transport import BufferTransport
+
+ROWS = "rows"
+STATIC = "static"
+
+def runElement(printer, element):
+    """Call a single template element on printer.
+    An element is either a callable taking the printer as the only argument, or a tuple of the name of a
+    POSprinter method followed by its arguments. If the last item of the tuple is a dict it is used as keyword arguments,
+    e.g. ("write", "Hello\\n", {"align": "center"}) or ("lineFeed", 2).
+    ("static", name, elements) is a static part of a receipt (e.g. the header), which is rendered once and then
+    taken from a cache (see POSprinter.printStatic)."""
+    if callable(element):
+        element(printer)
+        return
+    if element[0] == STATIC:
+        printer.printStatic(element[1], element[2])
+        return
+    name = element[0]
+    args = list(element[1:])
+    kwargs = {}
+    if args and isinstance(args[-1], dict):
+        kwargs = args.pop()
+    getattr(printer, name)(*args, **kwargs)
+
+
+class Stream:
+    """Render a receipt lazily from a declarative template and an iterator of rows.
+    template is a list of elements (see runElement). One of them may be ("rows", columns) where columns is
+    a Table or a list of Column objects; this is where the rows are laid out. Everything before it is the
+    header and everything after it is the footer. Footer elements may be callables, so e.g. totals gathered
+    while the rows were produced can be printed.
+    Nothing is rendered before it is needed and the rows are never held in memory all at once, so the
+    first line is printed while later rows are still being produced.
+    linesPerChunk is the number of row lines sent to the printer in a single write."""
+    def __init__(self, printer, template, linesPerChunk=8, encoding="cp437"):
+        self.printer = printer
+        self.template = template
+        self.linesPerChunk = linesPerChunk
+        self.encoding = encoding
+        self.table = None
+        for element in template:
+            if isinstance(element, tuple) and element[0] == ROWS:
+                if self.table is not None:
+                    raise ValueError("A template may only contain one \"%s\" element" % ROWS)
+                self.table = element[1]
+                if not isinstance(self.table, Table):
+                    self.table = Table(self.table, printer.width)
+
+    def iterChunks(self, rows):
+        """Generate the output for the printer chunk by chunk."""
+        buf = BufferTransport()
+        for element in self.template:
+            if isinstance(element, tuple) and element[0] == ROWS:
+                for chunk in self._iterRowChunks(rows):
+                    yield chunk
+                continue
+            with self.printer.redirect(buf):
+                runElement(self.printer, element)
+            data = buf.reset()
+            if data:
+                yield data
+
+    def _iterRowChunks(self, rows):
+        lines = []
+        for line in self.table.iterLines(rows):
+            lines.append(line)
+            if len(lines) >= self.linesPerChunk:
+                yield self._encode(lines)
+                lines = []
+        if lines:
+            yield self._encode(lines)
+
+    def _encode(self, lines):
+        string = "\n".join(lines) + "\n"
+        if isinstance(string, unicode):
+            string = encode(string, self.encoding)
+        return string
+
+    def send(self, rows, transport=None):
+        """Render and send the receipt. Each chunk is sent to the printer (or written to transport) as soon as it
+        has been rendered, and what the transport holds back (e.g. a scheduler batch) is flushed at the end.
+        Returns the number of bytes sent."""
+        if transport is None:
+            write = self.printer._transmit
+        else:
+            write = transport.write
+        sent = 0
+        for chunk in self.iterChunks(rows):
+            write(chunk)
+            sent += len(chunk)
+        if transport is None:
+            self.printer.flush()
+        elif hasattr(transport, "flush"):
+            transport.flush()
+        return sent
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Columnar layout of text (e.g. the item lines of a receipt) for POSprinter"""
+import codecs
+import unicodedata
+
+# Alignment functions used for cells containing only single width characters
+_ALIGN = {
+    "left": lambda txt, width: txt.ljust(width),
+    "right": lambda txt, width: txt.rjust(width),
+    "center": lambda txt, width: txt.center(width),
+    }
+
+def cellWidth(char):
+    """Number of character cells a single character occupies on the printer.
+    East asian wide and full width characters take two cells, combining characters none."""
+    if char < u"\u0300":
+        return 1
+    if unicodedata.combining(char):
+        return 0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return 2
+    return 1
+
+def _replaceCells(error):
+    """Encoding error handler replacing each character missing from the code page by a "?" per cell it occupies,
+    so the columns of a Table stay aligned (see encode)"""
+    missing = error.object[error.start:error.end]
+    return u"".join([ u"?" * cellWidth(c) for c in missing ]), error.end
+
+codecs.register_error("POSprinter.cells", _replaceCells)
+
+def encode(txt, encoding="cp437"):
+    """Encode unicode text laid out by a Table for the printer. Characters missing from the code page (e.g. wide
+    characters in cp437) are replaced by a "?" per character cell, so the columns keep their width."""
+    return txt.encode(encoding, "POSprinter.cells")
+
+def textWidth(txt):
+    """Number of character cells a string occupies on the printer."""
+    if isinstance(txt, str) or _isNarrow(txt):
+        return len(txt)
+    return sum([ cellWidth(c) for c in txt ])
+
+def _isNarrow(txt):
+    """True if all characters of a unicode string occupy exactly one cell."""
+    return not txt or max(txt) < u"\u0300"
+
+def _cut(txt, width):
+    """Split txt in two so that the first part is at most width cells wide."""
+    used = 0
+    for i, c in enumerate(txt):
+        used += cellWidth(c)
+        if used > width:
+            return txt[:i], txt[i:]
+    return txt, txt[:0]
+
+def _pad(txt, width, align):
+    """Pad txt with blanks to exactly width cells"""
+    blanks = width - textWidth(txt)
+    if blanks <= 0:
+        return txt
+    if align == "right":
+        return " " * blanks + txt
+    if align == "center":
+        return " " * (blanks // 2) + txt + " " * (blanks - blanks // 2)
+    return txt + " " * blanks
+
+def _wrap(txt, width):
+    """Word wrap txt to lines of at most width cells. Words wider than a line are split."""
+    lines = []
+    line = txt[:0]
+    # The width of line in cells
+    used = 0
+    measure = len if isinstance(txt, str) or _isNarrow(txt) else textWidth
+    for word in txt.split():
+        size = measure(word)
+        if line and used + 1 + size <= width:
+            line += " " + word
+            used += 1 + size
+            continue
+        if not line and size <= width:
+            line = word
+            used = size
+            continue
+        if line:
+            lines.append(line)
+        line = word
+        used = size
+        while used > width:
+            head, line = _cut(line, width)
+            if not head:
+                # A character wider than the line: it gets a line of its own
+                head, line = line[:1], line[1:]
+            lines.append(head)
+            used = measure(line)
+    if line or not lines:
+        lines.append(line)
+    return lines
+
+
+class Column:
+    """Specification of a single column of a Table.
+    width is the number of characters of the column. If width is None the column takes
+    an equal share of what is left of the paper width by the fixed width columns.
+    align may be set to "left", "center" or "right".
+    overflow may be set to "truncate" (cut text at the column width) or "wrap"
+    (word wrap the text onto as many lines as needed)."""
+    def __init__(self, width=None, align="left", overflow="truncate"):
+        if align not in _ALIGN:
+            raise ValueError("align must be part of %s" % str(sorted(_ALIGN)))
+        if overflow not in ("truncate", "wrap"):
+            raise ValueError("overflow must be either \"truncate\" or \"wrap\"")
+        self.width = width
+        self.align = align
+        self.overflow = overflow
+
+
+class Table:
+    """Lay out rows of text in columns. The column widths are computed once against the
+    character width of the paper (charWidth), so a Table may be reused for many rows and receipts.
+    columns is a list of Column objects (or of widths, which are then left aligned and truncated).
+    separator is put between the columns."""
+    def __init__(self, columns, charWidth=44, separator=" "):
+        self.columns = [ c if isinstance(c, Column) else Column(c) for c in columns ]
+        if not self.columns:
+            raise ValueError("A Table needs at least one column")
+        self.charWidth = charWidth
+        self.separator = separator
+        self.widths = self._computeWidths()
+        for column, width in zip(self.columns, self.widths):
+            if column.overflow == "wrap" and width < 2:
+                raise ValueError("A wrapped column must be at least 2 characters wide, so a wide character fits")
+        self._fast = [ _ALIGN[c.align] for c in self.columns ]
+        self._format = self._compileFormat()
+        if self._format is not None:
+            self._lineWidth = len(self._format % tuple([ "" ] * len(self.columns)))
+
+    def _computeWidths(self):
+        """Distribute the paper width among the columns."""
+        free = self.charWidth - textWidth(self.separator) * (len(self.columns) - 1)
+        flexible = []
+        widths = []
+        for i, column in enumerate(self.columns):
+            if column.width is None:
+                flexible.append(i)
+                widths.append(0)
+            else:
+                widths.append(column.width)
+                free -= column.width
+        if free < len(flexible) or (free < 0):
+            raise ValueError("The columns are %d characters too wide for a paper width of %d characters" % (len(flexible) - free, self.charWidth))
+        for n, i in enumerate(flexible):
+            # The first columns get the remainder when free does not divide evenly
+            widths[i] = free // len(flexible) + (1 if n < free % len(flexible) else 0)
+        return widths
+
+    def _compileFormat(self):
+        """A format string laying out a row in a single % operation. Only used for rows of
+        single width characters that fit on one line. None if a column is centered.
+        Wrapped columns are not cut by the format, so a row that needs wrapping makes the line too long."""
+        fields = []
+        for column, width in zip(self.columns, self.widths):
+            if column.align == "center":
+                return None
+            precision = "" if column.overflow == "wrap" else ".%d" % width
+            fields.append("%%%s%d%ss" % ("-" if column.align == "left" else "", width, precision))
+        return self.separator.replace("%", "%%").join(fields)
+
+    def _formatRow(self, row):
+        """The line of a row laid out by the format string, or None if the row needs the full layout (wide
+        characters, wrapping or the wrong number of cells)"""
+        try:
+            line = self._format % tuple(row)
+        except TypeError:
+            return None
+        if len(line) != self._lineWidth or (line.__class__ is not str and not _isNarrow(line)):
+            return None
+        return line.rstrip()
+
+    def renderRow(self, row):
+        """Return the printed lines (without newlines) of a single row as a list."""
+        if self._format is not None:
+            line = self._formatRow(row)
+            if line is not None:
+                return [ line ]
+        if len(row) != len(self.columns):
+            raise ValueError("The row has %d cells but the table has %d columns" % (len(row), len(self.columns)))
+        cells = []
+        height = 1
+        for value, column, width, fast in zip(row, self.columns, self.widths, self._fast):
+            if not isinstance(value, basestring):
+                value = str(value)
+            if isinstance(value, str) or _isNarrow(value):
+                # Fast path: one character is one cell
+                if column.overflow == "wrap" and len(value) > width:
+                    cell = [ fast(l, width) for l in _wrap(value, width) ]
+                else:
+                    cell = [ fast(value[:width], width) ]
+            else:
+                if column.overflow == "wrap":
+                    lines = _wrap(value, width)
+                else:
+                    lines = [ _cut(value, width)[0] ]
+                cell = [ _pad(l, width, column.align) for l in lines ]
+            height = max(height, len(cell))
+            cells.append(cell)
+        if height == 1:
+            return [ self.separator.join([ cell[0] for cell in cells ]).rstrip() ]
+        lines = []
+        for i in range(height):
+            parts = []
+            for cell, width in zip(cells, self.widths):
+                parts.append(cell[i] if i < len(cell) else " " * width)
+            lines.append(self.separator.join(parts).rstrip())
+        return lines
+
+    def iterLines(self, rows):
+        """Generate the printed lines (without newlines) of rows one by one."""
+        for row in rows:
+            for line in self.renderRow(row):
+                yield line
+
+    def render(self, rows):
+        """Return rows laid out as a single string with a newline after each line."""
+        lines = []
+        renderRow = self.renderRow
+        for row in rows:
+            lines.extend(renderRow(row))
+        if not lines:
+            return ""
+        return "\n".join(lines) + "\n"
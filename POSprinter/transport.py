@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""Transports that may be used by POSprinter instead of a serial port"""
+
+class BufferTransport:
+    """Keep everything written in memory, e.g. to compile output before it is sent to a printer."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        # Buffers (e.g. assets.Bundle slices) are kept as strings
+        self.chunks.append(str(data))
+        return len(data)
+
+    def getvalue(self):
+        """Everything written since the transport was created or last reset."""
+        return "".join(self.chunks)
+
+    def reset(self):
+        """Return everything written so far and empty the buffer."""
+        data = self.getvalue()
+        self.chunks = []
+        return data
+
+    def close(self):
+        pass
+
+
+class NullTransport:
+    """Throw away everything written, but count the bytes and writes (e.g. for benchmarks)."""
+    def __init__(self):
+        self.bytes = 0
+        self.writes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        self.writes += 1
+        return len(data)
+
+    def close(self):
+        pass
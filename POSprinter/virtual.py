@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# "THE BEER-WARE LICENSE" (Revision 42):
+# Georg Sluyterman <georg@sman.dk> wrote this file. As long as you retain this notice you
+# can do whatever you want with this stuff. If we meet some day, and you think
+# this stuff is worth it, you can buy me a beer in return.
+#
+
+"""A virtual printer, which interprets what POSprinter sends and renders it to an image. It is used as the transport
+of a POSprinter to check output without wasting paper:
+    virtual = VirtualPrinter()
+    printer = POSprinter(transport=virtual)
+    printer.printLine()
+    virtual.image().save("receipt.png")
+The virtual printer has a resolution of 180 dpi, like high resolution images."""
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from .escpos import iterCommands
+
+DPI = 180
+
+def bandImage(m, data):
+    """A bit image band (ESC * m) as a PIL image at 180 dpi"""
+    if m in (32, 33):
+        rows = 24
+    else:
+        rows = 8
+    columns = len(data) * 8 // rows
+    # The data is column by column, top dot first, so read it as rows of a narrow image and transpose
+    img = Image.frombytes("1", (rows, columns), data, "raw", "1;I").transpose(Image.TRANSPOSE)
+    # Horizontal density: m = 1 and 33 are double density (180 dpi), 0 and 32 single density (90 dpi)
+    # Vertical density: 8-dot modes are 60 dpi, 24-dot modes 180 dpi
+    xScale = 1 if m in (1, 33) else 2
+    yScale = 3 if rows == 8 else 1
+    if xScale != 1 or yScale != 1:
+        img = img.resize((columns * xScale, rows * yScale))
+    return img
+
+def rasterImage(m, xBytes, yDots, data):
+    """A raster bit image (GS v 0 m) as a PIL image at 180 dpi"""
+    img = Image.frombytes("1", (xBytes * 8, yDots), data, "raw", "1;I")
+    xScale = 2 if m & 1 else 1
+    yScale = 2 if m & 2 else 1
+    if xScale != 1 or yScale != 1:
+        img = img.resize((xBytes * 8 * xScale, yDots * yScale))
+    return img
+
+def barcodeImage(m, data, height, moduleWidth):
+    """A barcode printed with GS k m (the form with a length byte) as a PIL image and its human readable text"""
+    from . import barcode
+    symbology = dict([ (n, name) for name, n in barcode.NATIVE.items() ])[m]
+    if symbology == barcode.CODE128:
+        # The data starts with the code set ("{B") and "{" is written as "{{"
+        data = data[2:].replace("{{", "{")
+    modules = barcode.ENCODERS[symbology](data)
+    if symbology == barcode.EAN13:
+        data += barcode.eanCheckDigit(data)
+    row = Image.frombytes("L", (len(modules), 1), modules.replace("1", "\x00").replace("0", "\xFF"))
+    return row.resize((len(modules) * moduleWidth, height)).convert("1"), data
+
+def expandMacros(commands):
+    """Generate commands with macros replaced by what they do: the definition (GS : to GS :) is not printed, and each
+    execution (GS ^ r t m) is replaced by the commands of the macro r times"""
+    macro = None
+    defining = False
+    for command in commands:
+        if command.name == "GS :":
+            defining = not defining
+            if defining:
+                macro = []
+        elif defining:
+            macro.append(command)
+        elif command.name == "GS ^" and macro:
+            for i in range(command.params[0]):
+                for replayed in macro:
+                    yield replayed
+        else:
+            yield command
+
+
+class VirtualPrinter:
+    """A transport which keeps what is written, and interprets it as ESC/POS on demand:
+    commands() returns the structured command log (escpos.Command objects) and image() the printed paper.
+    pxWidth and charWidth are those of the POSprinter (pxWidth is in low resolution dots, so the paper is
+    pxWidth * 2 dots wide at 180 dpi). motionUnits are the motion units of the printer in units per inch.
+    lineSpacing is the line spacing in dots (1/180 inch) after the printer is reset. The ESC/POS default is 30
+    (1/6 inch); images printed as bands separated by newlines only join up when it is 24."""
+    def __init__(self, pxWidth=284, charWidth=44, motionUnits=(180, 180), lineSpacing=30):
+        self.width = pxWidth * 2
+        self.charWidth = charWidth
+        self.motionUnits = motionUnits
+        self.defaultLineSpacing = lineSpacing
+        self.chunks = []
+        self.font = ImageFont.load_default()
+
+    def write(self, data):
+        self.chunks.append(str(data))
+        return len(data)
+
+    def close(self):
+        pass
+
+    def reset(self):
+        """Forget everything written"""
+        self.chunks = []
+
+    @property
+    def data(self):
+        return "".join(self.chunks)
+
+    def commands(self):
+        """The commands written, as a list of escpos.Command objects"""
+        return list(iterCommands(self.data))
+
+    def cuts(self):
+        """Number of paper cuts"""
+        return len([ c for c in expandMacros(iterCommands(self.data)) if c.name == "GS V" ])
+
+    def _xUnits(self, units):
+        return units * DPI // self.motionUnits[0]
+
+    def _yUnits(self, units):
+        return units * DPI // self.motionUnits[1]
+
+    def layout(self):
+        """Interpret the commands. Returns a list of (x, y, item) where item is a PIL image or a text string,
+        the height of the paper in dots and the y positions of cuts."""
+        items = []
+        cuts = []
+        y = 0
+        x = 0
+        margin = 0
+        lineSpacing = self.defaultLineSpacing
+        lineHeight = 0
+        cellWidth = self.width / float(self.charWidth)
+        # Justification (ESC a) and the first item of the current line
+        justify = 0
+        lineStart = 0
+        # Barcode height, module width and HRI position (GS h, GS w, GS H)
+        barcode = [ 162, 3, 0 ]
+        # Page mode (ESC L): the top of the page, its height and the vertical position (GS $), None in standard mode
+        page = None
+        for command in expandMacros(iterCommands(self.data)):
+            name = command.name
+            p = command.params
+            if name in ("LF", "ESC J", "ESC d") and justify and x:
+                shift = (self.width - margin - x) // (2 if justify == 1 else 1)
+                items[lineStart:] = [ (ix + shift, iy, item) for ix, iy, item in items[lineStart:] ]
+            if name == "text":
+                items.append((margin + x, page[0] + page[2] - 24 if page else y, command.payload))
+                x += int(len(command.payload) * cellWidth)
+                lineHeight = max(lineHeight, 24)
+            elif name == "LF":
+                y += max(lineSpacing, 0)
+                x = 0
+                lineHeight = 0
+                lineStart = len(items)
+            elif name == "ESC J":
+                y += self._yUnits(p[0])
+                x = 0
+                lineHeight = 0
+                lineStart = len(items)
+            elif name == "ESC d":
+                y += p[0] * lineSpacing
+                x = 0
+                lineHeight = 0
+                lineStart = len(items)
+            elif name == "ESC a":
+                justify = p[0] % 48
+            elif name in ("GS h", "GS w", "GS H"):
+                barcode[("GS h", "GS w", "GS H").index(name)] = p[0]
+            elif name == "GS k":
+                img, text = barcodeImage(p[0], command.payload, barcode[0], barcode[1])
+                left = (self.width - margin - img.size[0]) // 2 * justify
+                items.append((margin + left, y, img))
+                y += img.size[1]
+                if barcode[2] % 48 in (2, 3):
+                    left = int((self.width - margin - len(text) * cellWidth) // 2 * justify)
+                    items.append((margin + left, y, text))
+                    y += lineSpacing
+                x = 0
+                lineStart = len(items)
+            elif name == "ESC 3":
+                lineSpacing = self._yUnits(p[0])
+            elif name == "ESC 2":
+                lineSpacing = 30
+            elif name == "ESC @":
+                lineSpacing = self.defaultLineSpacing
+                margin = 0
+                x = 0
+                justify = 0
+            elif name == "ESC $":
+                x = self._xUnits(p[0] + p[1] * 256)
+            elif name == "GS L":
+                margin = self._xUnits(p[0] + p[1] * 256)
+            elif name == "ESC *":
+                img = bandImage(p[0], command.payload)
+                items.append((margin + x, page[0] + page[2] - img.size[1] if page else y, img))
+                x += img.size[0]
+                lineHeight = max(lineHeight, img.size[1])
+            elif name == "GS v":
+                img = rasterImage(p[1], p[2] + p[3] * 256, p[4] + p[5] * 256, command.payload)
+                items.append((margin, y, img))
+                y += img.size[1]
+                x = 0
+                lineStart = len(items)
+            elif name == "ESC L":
+                page = [ y, 0, 0 ]
+            elif name == "ESC W" and page:
+                page[1] = self._yUnits(p[6] + p[7] * 256)
+            elif name == "GS $" and page:
+                page[2] = self._yUnits(p[0] + p[1] * 256)
+            elif name == "FF" and page:
+                y = page[0] + page[1]
+                page = None
+                x = 0
+                lineHeight = 0
+                lineStart = len(items)
+            elif name == "GS V":
+                if lineHeight:
+                    y += lineSpacing
+                    lineHeight = 0
+                cuts.append(y)
+        return items, y + lineHeight, cuts
+
+    def image(self):
+        """The printed paper as a PIL image (mode "1") at 180 dpi, with cuts marked by a dotted line"""
+        items, height, cuts = self.layout()
+        img = Image.new("1", (self.width, max(height, 1)), 255)
+        draw = ImageDraw.Draw(img)
+        for x, y, item in items:
+            if isinstance(item, basestring):
+                draw.text((x, y + 6), item.decode("cp437", "replace"), font=self.font, fill=0)
+            else:
+                img.paste(item, (x, y))
+        for y in cuts:
+            for x in range(0, self.width, 8):
+                draw.point((x, y), fill=0)
+        return img
+
+
+def render(data, **kwargs):
+    """Render a string of printer commands to a PIL image (see VirtualPrinter for the keyword arguments)"""
+    virtual = VirtualPrinter(**kwargs)
+    virtual.write(data)
+    return virtual.image()
+
+def sameOutput(a, b, **kwargs):
+    """Compare two strings of printer commands. Returns "identical" if the bytes are the same, "visual" if they
+    print the same, and None if they differ (see VirtualPrinter for the keyword arguments)."""
+    if a == b:
+        return "identical"
+    imgA = render(a, **kwargs)
+    imgB = render(b, **kwargs)
+    if imgA.size == imgB.size and ImageChops.difference(imgA.convert("L"), imgB.convert("L")).getbbox() is None:
+        return "visual"
+    return None
@@ -0,0 +1,157 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Benchmarks of image encoding, text layout, QR codes and whole receipts, run against a transport that throws
+the output away (no printer needed).
+
+    python benchmarks/bench.py                  run and compare with the stored baseline
+    python benchmarks/bench.py --save           run and store the results as the new baseline
+    python benchmarks/bench.py -k qr            only run benchmarks with "qr" in the name
+
+For every benchmark the operations per second and the bytes sent to the printer per operation are reported.
+A benchmark is flagged as a regression if it is more than --tolerance slower than the baseline, or if it
+sends a different number of bytes (the output of the encoders should not change by accident)."""
+import json
+import optparse
+import os
+import sys
+import time
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from POSprinter.POSprinter import POSprinter
+from POSprinter.transport import NullTransport
+from POSprinter.table import Column
+from pyqrnative import PyQRNative
+from PIL import Image, ImageDraw
+
+BASELINE = os.path.join(HERE, "baseline.json")
+FONT = "/usr/share/fonts/truetype/ubuntu-font-family/Ubuntu-B.ttf"
+PARAGRAPH = ("Thank you for shopping with us. Goods may be returned within 30 days when accompanied by this receipt. "
+    "Opening hours are Monday to Friday 9-18 and Saturday 10-14. ") * 4
+
+def testImage(size):
+    """A deterministic greyscale test image with shapes and a gradient"""
+    img = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for i in range(0, w, max(1, w // 8)):
+        draw.line((i, 0, w - i, h), fill=i * 255 // w)
+    draw.ellipse((w // 4, h // 4, w * 3 // 4, h * 3 // 4), fill=0)
+    draw.rectangle((0, h // 2, w // 5, h // 2 + h // 10), fill=96)
+    return img
+
+def newPrinter():
+    return POSprinter(transport=NullTransport())
+
+def imgMatrixCase(size, resolution):
+    img = testImage(size).convert("1")
+    matrix = img.load()
+    def run(printer):
+        printer.printImgMatrix(matrix, size[0], size[1], resolution, "center")
+    return run
+
+def fontTextCase(font):
+    def run(printer):
+        printer.printFontText(PARAGRAPH, fontFile=font, textSize=22)
+    return run
+
+def qrCase(version, level, maskStrategy=None):
+    def run(printer):
+        qr = PyQRNative.QRCode(version, level)
+        qr.addData("1234567")
+        qr.make(maskStrategy)
+    return run
+
+def receiptCase(font):
+    logo = testImage((200, 120))
+    rows = [ (i % 4 + 1, "Item number %d" % i, "%.2f" % (i * 1.25), "%.2f" % (i * 1.25 * (i % 4 + 1))) for i in range(20) ]
+    columns = [ Column(3, "right"), Column(None, overflow="wrap"), Column(8, "right"), Column(9, "right") ]
+    def run(printer):
+        printer.printImgFromPILObject(logo, scale=0.5)
+        if font:
+            printer.printFontText("The Shop\nMain Street 1", fontFile=font, align="center")
+        printer.printLine()
+        printer.printTable(columns, rows)
+        printer.printLine(style="double")
+        printer.write("Total", rcolStr="%.2f\n" % sum([ float(r[3]) for r in rows ]))
+        qr = PyQRNative.QRCode(3, PyQRNative.QRErrorCorrectLevel.M)
+        qr.addData("http://www.sman.dk")
+        qr.make()
+        printer.printImgFromPILObject(qr.makeImage(), scale=0.5)
+        printer.lineFeedCut()
+    return run
+
+def benchmarks(font):
+    cases = []
+    for size in ((64, 64), (256, 256), (568, 568), (568, 2000)):
+        cases.append(("imgMatrix high %dx%d" % size, imgMatrixCase(size, "high")))
+    for size in ((64, 64), (256, 256), (284, 568)):
+        cases.append(("imgMatrix low %dx%d" % size, imgMatrixCase(size, "low")))
+    if font:
+        cases.append(("fontText paragraph", fontTextCase(font)))
+    levels = [ ("L", PyQRNative.QRErrorCorrectLevel.L), ("M", PyQRNative.QRErrorCorrectLevel.M),
+        ("Q", PyQRNative.QRErrorCorrectLevel.Q), ("H", PyQRNative.QRErrorCorrectLevel.H) ]
+    for version in (1, 5, 10):
+        for name, level in levels:
+            cases.append(("qr make v%d %s" % (version, name), qrCase(version, level)))
+        for strategy in (PyQRNative.QRMaskStrategy.HEURISTIC, PyQRNative.QRMaskStrategy.FIXED):
+            cases.append(("qr make v%d M %s" % (version, strategy), qrCase(version, levels[1][1], strategy)))
+    cases.append(("receipt", receiptCase(font)))
+    return cases
+
+def measure(func, minTime):
+    """Run func(printer) repeatedly for at least minTime seconds. Returns operations per second and bytes per operation."""
+    printer = newPrinter()
+    func(printer)
+    bytesPerOp = printer.printer.bytes
+    runs = 0
+    start = time.time()
+    while True:
+        func(printer)
+        runs += 1
+        elapsed = time.time() - start
+        if elapsed >= minTime:
+            return runs / elapsed, bytesPerOp
+
+def main():
+    parser = optparse.OptionParser(usage=__doc__)
+    parser.add_option("--save", action="store_true", help="store the results as the baseline")
+    parser.add_option("--baseline", default=BASELINE, help="baseline file (default %default)")
+    parser.add_option("--tolerance", type="float", default=0.2, help="allowed slowdown as a fraction (default %default)")
+    parser.add_option("--min-time", dest="minTime", type="float", default=0.5, help="seconds per benchmark (default %default)")
+    parser.add_option("--font", default=FONT, help="truetype font for the text benchmarks (default %default)")
+    parser.add_option("-k", dest="keyword", help="only run benchmarks containing KEYWORD")
+    options, args = parser.parse_args()
+    font = options.font if os.path.exists(options.font) else None
+    if not font:
+        sys.stderr.write("Font %s not found, skipping text benchmarks\n" % options.font)
+    baseline = {}
+    if os.path.exists(options.baseline):
+        baseline = json.load(open(options.baseline))
+    results = {}
+    regressions = 0
+    for name, func in benchmarks(font):
+        if options.keyword and options.keyword not in name:
+            continue
+        opsPerSec, bytesPerOp = measure(func, options.minTime)
+        results[name] = { "opsPerSec": opsPerSec, "bytes": bytesPerOp }
+        note = ""
+        if name in baseline and not options.save:
+            old = baseline[name]
+            note = "%+6.1f%%" % ((opsPerSec / old["opsPerSec"] - 1) * 100)
+            if opsPerSec < old["opsPerSec"] * (1 - options.tolerance):
+                note += " SLOWER"
+                regressions += 1
+            if bytesPerOp != old["bytes"]:
+                note += " BYTES CHANGED (%d)" % old["bytes"]
+                regressions += 1
+        print("%-28s %10.2f ops/s %9d bytes %s" % (name, opsPerSec, bytesPerOp, note))
+    if options.save:
+        baseline.update(results)
+        json.dump(baseline, open(options.baseline, "w"), indent=1, sort_keys=True)
+        print("Baseline saved to %s" % options.baseline)
+    elif regressions:
+        print("%d regression(s)" % regressions)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Startup benchmark: the time to import POSprinter and pyqrnative, and the time of the first receipt with lazy
+loading (everything is loaded when first used) and after printer.warmup(). Every measurement is made in a new
+Python process, so nothing is loaded beforehand.
+
+    python benchmarks/bench_import.py [--runs N] [--font FONT]"""
+import optparse
+import os
+import subprocess
+import sys
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+FONT = "/usr/share/fonts/truetype/ubuntu-font-family/Ubuntu-B.ttf"
+
+SETUP = """
+import sys, time
+sys.path.insert(0, %(root)r)
+start = time.time()
+from POSprinter.POSprinter import POSprinter
+from POSprinter.transport import NullTransport
+imported = time.time()
+printer = POSprinter(transport=NullTransport())
+"""
+
+RECEIPT = """
+def receipt():
+    from PIL import Image
+    printer.printImgFromPILObject(Image.new("1", (200, 100), 0), scale=0.5)
+    if %(font)r:
+        printer.printFontText("The Shop", fontFile=%(font)r)
+    printer.printQR("http://www.sman.dk")
+    printer.lineFeedCut()
+"""
+
+LAZY = SETUP + RECEIPT + """
+first = time.time()
+receipt()
+done = time.time()
+print imported - start, 0.0, done - first
+"""
+
+WARM = SETUP + RECEIPT + """
+warm = time.time()
+printer.warmup(fonts=[ (%(font)r, 25) ] if %(font)r else [])
+first = time.time()
+receipt()
+done = time.time()
+print imported - start, first - warm, done - first
+"""
+
+QR_IMPORT = """
+import sys, time
+sys.path.insert(0, %(root)r)
+start = time.time()
+from pyqrnative import PyQRNative
+print time.time() - start, 0.0, 0.0
+"""
+
+def run(code, runs, font):
+    """Run code in new processes. Returns the best of each of the three times it prints."""
+    best = None
+    for i in range(runs):
+        output = subprocess.check_output([ sys.executable, "-c", code % { "root": ROOT, "font": font } ])
+        times = [ float(t) for t in output.split() ]
+        best = times if best is None else [ min(a, b) for a, b in zip(best, times) ]
+    return best
+
+def main():
+    parser = optparse.OptionParser(usage=__doc__)
+    parser.add_option("--runs", type="int", default=5, help="processes per measurement, the best is shown (default %default)")
+    parser.add_option("--font", default=FONT, help="truetype font of the receipt (default %default)")
+    options, args = parser.parse_args()
+    font = options.font if os.path.exists(options.font) else None
+    print("%-24s %10s %10s %14s" % ("", "import ms", "warmup ms", "1st receipt ms"))
+    for name, code in (("import pyqrnative", QR_IMPORT), ("lazy", LAZY), ("warmup", WARM)):
+        imported, warm, first = run(code, options.runs, font)
+        print("%-24s %10.1f %10.1f %14.1f" % (name, imported * 1000, warm * 1000, first * 1000))
+
+if __name__ == "__main__":
+    main()
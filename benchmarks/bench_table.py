@@ -0,0 +1,58 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Benchmark the Table layout on a 500 line invoice against formatting each line by hand
+with the arithmetic used by POSprinter.write(rcolStr=...)."""
+import os
+import sys
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from POSprinter.table import Table, Column
+
+CHARWIDTH = 44
+LINES = 500
+REPEAT = 20
+
+def invoiceRows(lines=LINES):
+    """Rows of quantity, item, unit price and total. Every tenth item has a long (wrapped) name
+    and every 25th contains wide characters."""
+    rows = []
+    for i in range(lines):
+        name = "Item number %d" % i
+        if i % 10 == 0:
+            name += " with a very long description that must be wrapped"
+        if i % 25 == 0:
+            name = u"商品 " + name
+        qty = i % 7 + 1
+        price = (i % 13) * 2.25 + 1
+        rows.append((qty, name, "%.2f" % price, "%.2f" % (qty * price)))
+    return rows
+
+def byHand(rows, width=CHARWIDTH):
+    """Pad each line the way callers do today with a loop around POSprinter.write"""
+    out = []
+    for qty, name, price, total in rows:
+        string = ("%3d " % qty) + name[:width - 22]
+        rcolStr = "%8s %9s\n" % (price, total)
+        lastLineLen = len(string) % width + len(rcolStr.rstrip("\n"))
+        if lastLineLen < width:
+            string += " " * (width - lastLineLen)
+        out.append(string + rcolStr)
+    return "".join(out)
+
+def main():
+    rows = invoiceRows()
+    table = Table([Column(3, "right"), Column(None, overflow="wrap"), Column(8, "right"), Column(9, "right")], CHARWIDTH)
+    results = [
+        ("hand formatted", lambda: byHand(rows)),
+        ("Table (reused)", lambda: table.render(rows)),
+        ("Table (new per invoice)", lambda: Table(table.columns, CHARWIDTH).render(rows)),
+        ]
+    for name, func in results:
+        seconds = min(timeit.repeat(func, number=REPEAT, repeat=3)) / REPEAT
+        output = func()
+        if not isinstance(output, str):
+            output = output.encode("cp437", "replace")
+        print("%-25s %8.2f ms/invoice %8d bytes" % (name, seconds * 1000, len(output)))
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import math
-from PIL import Image, ImageDraw
+import time
 
 #QRCode for Python
 #
@@ -54,8 +54,20 @@ class QRCode:
         return self.modules[row][col]
     def getModuleCount(self):
         return self.moduleCount
-    def make(self):
-        self.makeImpl(False, self.getBestMaskPattern() )
+    def make(self, maskStrategy=None, maxLostPoint=None, maskPattern=0):
+        #// maskStrategy is one of QRMaskStrategy (OPTIMAL if None). How the mask was chosen is kept in maskStats.
+        strategy = maskStrategy or QRMaskStrategy.OPTIMAL
+        start = time.time()
+        if strategy == QRMaskStrategy.OPTIMAL:
+            pattern, lostPoint, scored = self.getBestMaskPattern(), None, 8
+        elif strategy == QRMaskStrategy.HEURISTIC:
+            pattern, lostPoint, scored = self.getGoodMaskPattern(maxLostPoint)
+        elif strategy == QRMaskStrategy.FIXED:
+            pattern, lostPoint, scored = maskPattern, None, 0
+        else:
+            raise Exception("maskStrategy:" + str(maskStrategy))
+        self.maskStats = QRMaskStrategy.record(strategy, self.typeNumber, pattern, lostPoint, scored, time.time() - start)
+        self.makeImpl(False, pattern)
     def makeImpl(self, test, maskPattern):
 
         self.moduleCount = self.typeNumber * 4 + 17
@@ -116,9 +128,31 @@ class QRCode:
 
         return pattern
 
+    def getGoodMaskPattern(self, maxLostPoint=None):
+        #// Try the masks in order and stop at the first one losing less than maxLostPoint (points per module).
+        #// A mask is only scored until it is worse than the best one so far.
+        #// Returns (pattern, lostPoint, number of masks scored).
+        if maxLostPoint == None:
+            maxLostPoint = QRMaskStrategy.MAX_LOST_POINT
+        moduleCount = self.typeNumber * 4 + 17
+        limit = maxLostPoint * moduleCount * moduleCount
+        minLostPoint = None
+        pattern = 0
+        for i in range(8):
+            self.makeImpl(True, i)
+            lostPoint = QRUtil.getLostPoint(self, minLostPoint)
+            if (minLostPoint == None or minLostPoint > lostPoint):
+                minLostPoint = lostPoint
+                pattern = i
+            if minLostPoint < limit:
+                break
+        return pattern, minLostPoint, i + 1
+
     def createMovieClip(self):
         raise Exception("Method not relevant to Python port")
     def makeImage(self):
+        # PIL is imported here so that making QR codes (e.g. for printing them natively) does not load it
+        from PIL import Image, ImageDraw
         boxsize = 10 #pixels per box
         offset = 4 #boxes as border
         pixelsize = (self.getModuleCount() + offset + offset) * boxsize
@@ -385,6 +419,44 @@ class QRMaskPattern:
     PATTERN110 = 6
     PATTERN111 = 7
 
+class QRMaskStrategy:
+    #// OPTIMAL scores all 8 masks and takes the best one (the QR code standard).
+    #// HEURISTIC takes the first mask losing less than maxLostPoint points per module. The default of 2.0 is never
+    #// met at version 1 (no mask loses less than 882 points there) and seldom at version 2, so the heuristic then
+    #// scores all 8 masks like OPTIMAL, only with the early stop of getLostPoint.
+    #// FIXED takes the given mask without scoring.
+    OPTIMAL = "optimal"
+    HEURISTIC = "heuristic"
+    FIXED = "fixed"
+    MAX_LOST_POINT = 2.0
+
+    #// Per strategy: [ codes made, seconds spent choosing masks, seconds saved ]
+    totals = {}
+    #// Seconds of the last optimal search per type number, which the time saved is estimated from
+    optimalSeconds = {}
+
+    @staticmethod
+    def record(strategy, typeNumber, pattern, lostPoint, scored, seconds):
+        #// Keep the statistics of choosing a mask and return them as a dict. seconds saved is None until an
+        #// optimal search of the same type number has been timed.
+        if strategy == QRMaskStrategy.OPTIMAL:
+            QRMaskStrategy.optimalSeconds[typeNumber] = seconds
+        saved = QRMaskStrategy.optimalSeconds.get(typeNumber)
+        if saved != None:
+            saved = max(saved - seconds, 0.0)
+        totals = QRMaskStrategy.totals.setdefault(strategy, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += saved or 0.0
+        return { "strategy": strategy, "maskPattern": pattern, "lostPoint": lostPoint, "masksScored": scored,
+            "seconds": seconds, "savedSeconds": saved }
+
+    @staticmethod
+    def stats():
+        #// { strategy: { "codes", "seconds", "savedSeconds" } } of all QR codes made so far
+        return dict([ (strategy, { "codes": t[0], "seconds": t[1], "savedSeconds": t[2] })
+            for strategy, t in QRMaskStrategy.totals.items() ])
+
 class QRUtil(object):
     PATTERN_POSITION_TABLE = [
         [],
@@ -467,11 +539,18 @@ class QRUtil(object):
         if maskPattern == QRMaskPattern.PATTERN110 : return ( (i * j) % 2 + (i * j) % 3) % 2 == 0
         if maskPattern == QRMaskPattern.PATTERN111 : return ( (i * j) % 3 + (i + j) % 2) % 2 == 0
         raise Exception("bad maskPattern:" + maskPattern);
+    # Generator polynomials by error correction length. They are never modified, so they are shared.
+    _errorCorrectPolynomials = {}
+
     @staticmethod
     def getErrorCorrectPolynomial(errorCorrectLength):
+        a = QRUtil._errorCorrectPolynomials.get(errorCorrectLength)
+        if a is not None:
+            return a
         a = QRPolynomial([1], 0);
         for i in range(errorCorrectLength):
             a = a.multiply(QRPolynomial([1, QRMath.gexp(i)], 0) )
+        QRUtil._errorCorrectPolynomials[errorCorrectLength] = a
         return a
     @staticmethod
     def getLengthInBits(mode, type):
@@ -509,7 +588,9 @@ class QRUtil(object):
         else:
             raise Exception("type:" + type)
     @staticmethod
-    def getLostPoint(qrCode):
+    def getLostPoint(qrCode, limit=None):
+
+        #// If limit is given, scoring stops as soon as lostPoint reaches it (and a lostPoint >= limit is returned)
 
         moduleCount = qrCode.getModuleCount();
 
@@ -541,6 +622,9 @@ class QRUtil(object):
                 if (sameCount > 5):
                     lostPoint += (3 + sameCount - 5)
 
+            if (limit != None and lostPoint >= limit):
+                return lostPoint
+
         #// LEVEL2
 
         for row in range(moduleCount - 1):
@@ -553,6 +637,9 @@ class QRUtil(object):
                 if (count == 0 or count == 4):
                     lostPoint += 3
 
+        if (limit != None and lostPoint >= limit):
+            return lostPoint
+
         #// LEVEL3
 
         for row in range(moduleCount):
@@ -577,6 +664,9 @@ class QRUtil(object):
                         and  qrCode.isDark(row + 6, col) ):
                     lostPoint += 40
 
+        if (limit != None and lostPoint >= limit):
+            return lostPoint
+
         #// LEVEL4
 
         darkCount = 0;
@@ -977,4 +1067,12 @@ class QRBitBuffer:
             self.buffer.append(0)
         if bit:
             self.buffer[bufIndex] |= (0x80 >> (self.length % 8) )
-        self.length+=1
\ No newline at end of file
+        self.length+=1
+
+def warmup():
+    """Compute the error correction polynomials of all versions and levels, so that making the first QR code
+    is as fast as the following ones"""
+    for typeNumber in range(1, 41):
+        for errorCorrectLevel in (QRErrorCorrectLevel.L, QRErrorCorrectLevel.M, QRErrorCorrectLevel.Q, QRErrorCorrectLevel.H):
+            for rsBlock in QRRSBlock.getRSBlocks(typeNumber, errorCorrectLevel):
+                QRUtil.getErrorCorrectPolynomial(rsBlock.totalCount - rsBlock.dataCount)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Bundles of precompiled assets"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.assets import compileBundle
+from POSprinter.transport import BufferTransport
+
+
+class AssetTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "assets.bundle")
+        self.elements = { "hello": [ ("write", "Hello\n") ], "line": [ ("printLine", { "width": 0.5 }) ] }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testPrintAsset(self):
+        compileBundle(self.filename, elements=self.elements, profiles=("default", "tm-t88iii"))
+        for profile in ("default", "tm-t88iii"):
+            printer = POSprinter(transport=BufferTransport(), profile=profile)
+            bundle = printer.loadAssets(self.filename)
+            printer.printAsset("line")
+            direct = POSprinter(transport=BufferTransport(), profile=profile)
+            direct.printLine(width=0.5)
+            self.assertEqual(printer.printer.getvalue(), direct.printer.getvalue())
+            bundle.close()
+
+    def testWidthsAreChecked(self):
+        compileBundle(self.filename, elements=self.elements)
+        printer = POSprinter(transport=BufferTransport(), pxWidth=192)
+        bundle = printer.loadAssets(self.filename)
+        self.assertRaises(ValueError, printer.printAsset, "line")
+        bundle.close()
+        compileBundle(self.filename, elements=self.elements, pxWidth=192)
+        bundle = printer.loadAssets(self.filename)
+        printer.printAsset("line")
+        direct = POSprinter(transport=BufferTransport(), pxWidth=192)
+        direct.printLine(width=0.5)
+        self.assertEqual(printer.printer.getvalue(), direct.printer.getvalue())
+        bundle.close()
+
+    def testUnknownAsset(self):
+        compileBundle(self.filename, elements=self.elements)
+        printer = POSprinter(transport=BufferTransport(), profile="tm-t88iii")
+        bundle = printer.loadAssets(self.filename)
+        self.assertRaises(ValueError, printer.printAsset, "hello")
+        bundle.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Band by band conversion of images"""
+import unittest
+
+from PIL import Image
+
+from POSprinter.bands import iterBands
+from POSprinter.dither import Pipeline
+
+
+def gradient(width, height):
+    """A grey level image getting darker from the top to the bottom, with a grey level per column as well"""
+    img = Image.new("L", (width, height))
+    img.putdata([ (x * 3 + y * 2) % 256 for y in range(height) for x in range(width) ])
+    return img
+
+
+def stack(bands):
+    bands = list(bands)
+    img = Image.new("1", (bands[0].size[0], sum([ b.size[1] for b in bands ])))
+    top = 0
+    for band in bands:
+        img.paste(band, (0, top))
+        top += band.size[1]
+    return img
+
+
+class BandsTest(unittest.TestCase):
+    def setUp(self):
+        self.img = gradient(64, 100)
+
+    def assertSeamless(self, method, bandHeight):
+        pipeline = Pipeline(method)
+        whole = stack(pipeline.processBands([ self.img ]))
+        banded = stack(iterBands(self.img, bandHeight, pipeline))
+        self.assertEqual(list(banded.getdata()), list(whole.getdata()))
+
+    def testFloydSteinbergCarriesError(self):
+        self.assertSeamless("floyd-steinberg", 24)
+
+    def testBayerContinuesPattern(self):
+        self.assertSeamless("bayer", 24)
+        self.assertSeamless("bayer", 7)
+        # The pattern of the whole image is that of process()
+        pipeline = Pipeline("bayer")
+        self.assertEqual(list(stack(pipeline.processBands([ self.img ])).getdata()),
+            list(pipeline.process(self.img).getdata()))
+
+    def testThreshold(self):
+        self.assertSeamless("threshold", 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
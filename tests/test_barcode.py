@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Barcode encoders and barcodes made by the printer"""
+import unittest
+
+from POSprinter import barcode
+
+
+class EncoderTest(unittest.TestCase):
+    """Modules compared with reference encodings of the standards"""
+    def testEAN13(self):
+        # First digits 4, 7 and 6: left hand parity LGLLGG, LGLGLG and LGGGLL
+        self.assertEqual(barcode.ean13("4006381333931"), "101" "0001101" "0100111" "0101111" "0111101" "0001001"
+            "0110011" "01010" "1000010" "1000010" "1000010" "1110100" "1000010" "1100110" "101")
+        self.assertEqual(barcode.ean13("750103131130"), "101" "0110001" "0100111" "0011001" "0100111" "0111101"
+            "0110011" "01010" "1000010" "1100110" "1100110" "1000010" "1110010" "1110100" "101")
+        self.assertEqual(barcode.ean13("6291041500213"), "101" "0010011" "0010111" "0110011" "0100111" "0100011"
+            "0011001" "01010" "1001110" "1110010" "1110010" "1101100" "1100110" "1000010" "101")
+
+    def testCode128(self):
+        # Start B, "A" (33), check symbol 34 and stop
+        self.assertEqual(barcode.code128("A"), "11010010000" "10100011000" "10001011000" "1100011101011")
+        # Start C, "00" (0) twice, check symbol 2 and stop
+        self.assertEqual(barcode.code128("0000"), "11010011100" "11011001100" "11011001100" "11001100110"
+            "1100011101011")
+        self.assertEqual(barcode.code128Values("PJJ123C"), [ 104, 48, 42, 42, 17, 18, 19, 35, 55 ])
+
+    def testITF(self):
+        # Start (narrow bar and space twice), 1 in the bars and 2 in the spaces, stop (wide bar, narrow space and bar)
+        self.assertEqual(barcode.itf("12"), "1010" "111" "0" "1" "000" "1" "0" "1" "0" "111" "000" "11101")
+        self.assertEqual(barcode.itf("2"), barcode.itf("02"))
+
+
+class NativeBarcodeTest(unittest.TestCase):
+    def testOddITFIsPadded(self):
+        out = barcode.nativeCommands("12345", barcode.ITF)
+        self.assertTrue(out.endswith("\x1D\x6B\x46\x06012345"))
+
+    def testEvenITFIsUnchanged(self):
+        self.assertTrue(barcode.nativeCommands("1234", barcode.ITF).endswith("\x1D\x6B\x46\x041234"))
+
+    def testInvalidDataIsRefused(self):
+        self.assertRaises(ValueError, barcode.nativeCommands, "12a4", barcode.ITF)
+        self.assertRaises(ValueError, barcode.nativeCommands, u"caf\xe9", barcode.CODE128)
+        self.assertRaises(ValueError, barcode.nativeCommands, "", barcode.CODE128)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Printing copies of a job"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter, MACRO
+from POSprinter.transport import BufferTransport
+
+
+class CopiesTest(unittest.TestCase):
+    def setUp(self):
+        self.printer = POSprinter(transport=BufferTransport(), profile="tm-t88iii")
+
+    def compile(self, data):
+        with self.printer.job() as job:
+            self.printer.write(data)
+        return job
+
+    def testMacro(self):
+        self.printer.sendCopies(self.compile("Kitchen\n"), 3, wait=5)
+        self.assertEqual(self.printer.printer.getvalue(), "\x1D\x3A" + "Kitchen\n" + "\x1D\x3A" + "\x1D\x5E\x03\x05\x00")
+
+    def testManyCopies(self):
+        self.printer.sendCopies(self.compile("Kitchen\n"), 300)
+        self.assertEqual(self.printer.printer.getvalue(),
+            MACRO + "Kitchen\n" + MACRO + "\x1D\x5E\xFF\x00\x00" + "\x1D\x5E\x2D\x00\x00")
+
+    def testJobLargerThanMacro(self):
+        data = "x" * (self.printer.profile.macroSize + 1)
+        self.printer.sendCopies(self.compile(data), 2)
+        self.assertEqual(self.printer.printer.getvalue(), data * 2)
+
+    def testWithoutMacros(self):
+        printer = POSprinter(transport=BufferTransport())
+        with printer.copies(2):
+            printer.write("Kitchen\n")
+        self.assertEqual(printer.printer.getvalue(), "Kitchen\n" * 2)
+
+    def testNothingSentOnError(self):
+        try:
+            with self.printer.copies(2):
+                self.printer.write("Kitchen\n")
+                raise RuntimeError("out of stock")
+        except RuntimeError:
+            pass
+        self.assertEqual(self.printer.printer.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Estimates of the cost of print jobs"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.cost import CostModel, MM_PER_INCH
+from POSprinter.transport import BufferTransport
+
+
+class CalibrateTest(unittest.TestCase):
+    def setUp(self):
+        self.printer = POSprinter(transport=BufferTransport())
+
+    def testWithoutScheduler(self):
+        self.assertRaises(ValueError, self.printer.calibrate)
+
+    def testNothingSent(self):
+        self.printer.enableScheduler()
+        self.assertRaises(ValueError, self.printer.calibrate)
+
+    def testMeasuredThroughput(self):
+        self.assertRaises(ValueError, self.printer.calibrate, 0, 0.0)
+        self.printer.calibrate(480, 1.0)
+        self.assertAlmostEqual(self.printer.costModel.efficiency, 0.5)
+
+
+class PaperLengthTest(unittest.TestCase):
+    def setUp(self):
+        self.printer = POSprinter(transport=BufferTransport(), profile="tm-t88iii")
+        self.model = CostModel.fromPrinter(self.printer)
+
+    def paperLength(self, *commands):
+        with self.printer.job() as job:
+            for name, args in commands:
+                getattr(self.printer, name)(*args)
+        return self.model.paperLength(job.data)
+
+    def testNativeBarcode(self):
+        # 80 dots of bars and a line of human readable text below
+        self.assertAlmostEqual(self.paperLength(("printBarcode", ("4006381333931", "ean13"))),
+            80 * MM_PER_INCH / 180 + MM_PER_INCH / 6)
+
+    def testPage(self):
+        with self.printer.job() as job:
+            with self.printer.page(200) as page:
+                page.text(0, 0, "Total")
+                page.text(0, 100, "12.00")
+        self.assertAlmostEqual(self.model.paperLength(job.data), 200 * MM_PER_INCH / 180)
+
+    def testFeedCut(self):
+        self.assertAlmostEqual(self.paperLength(("lineFeedCut", ())), self.model.cutterDistance)
+        # GS V A n feeds n vertical motion units more
+        self.assertAlmostEqual(self.model.paperLength("\x1D\x56\x41\x12"),
+            self.model.cutterDistance + 18 * MM_PER_INCH / self.printer.motionUnits[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""The image encoders print the same as the legacy bit image bands"""
+import unittest
+
+from PIL import Image, ImageChops, ImageDraw
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.transport import BufferTransport
+from POSprinter import virtual
+
+# Bands separated by newlines only join up with a line spacing of 24 dots
+LINE_SPACING = 24
+
+
+class EncoderTest(unittest.TestCase):
+    def setUp(self):
+        # 50 rows, so the last band is not full
+        self.img = Image.new("1", (150, 50), 1)
+        draw = ImageDraw.Draw(self.img)
+        draw.rectangle((10, 5, 120, 45), fill=0)
+        draw.ellipse((30, 10, 80, 40), fill=1)
+
+    def encode(self, compact, raster, rotate):
+        printer = POSprinter(transport=BufferTransport())
+        printer.compactImages = compact
+        printer.rasterImages = raster
+        printer.printImgFromPILObject(self.img, rotate=rotate)
+        return printer.printer.getvalue()
+
+    def testCompact(self):
+        for rotate in (None, 90, 180, 270):
+            self.assertEqual(virtual.sameOutput(self.encode(False, False, rotate), self.encode(True, False, rotate),
+                lineSpacing=LINE_SPACING), "visual", "rotate %s" % rotate)
+
+    def testRaster(self):
+        # Raster images do not pad the last band to 24 rows, so the legacy output is as long as the raster output
+        # followed by blank paper
+        for rotate in (None, 90, 180, 270):
+            legacy = virtual.render(self.encode(False, False, rotate), lineSpacing=LINE_SPACING).convert("L")
+            raster = virtual.render(self.encode(True, True, rotate), lineSpacing=LINE_SPACING).convert("L")
+            self.assertEqual(legacy.size[0], raster.size[0])
+            self.assertTrue(0 <= legacy.size[1] - raster.size[1] < 24, "rotate %s" % rotate)
+            top = legacy.crop((0, 0) + raster.size)
+            self.assertEqual(ImageChops.difference(top, raster).getbbox(), None, "rotate %s" % rotate)
+            rest = legacy.crop((0, raster.size[1]) + legacy.size)
+            self.assertEqual(ImageChops.invert(rest).getbbox(), None, "rotate %s" % rotate)
+
+
+if __name__ == "__main__":
+    unittest.main()
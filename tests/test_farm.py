@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Compiling receipts in a pool of processes"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.farm import RenderFarm
+from POSprinter.stream import runElement
+from POSprinter.transport import BufferTransport
+
+
+class FarmTest(unittest.TestCase):
+    def testJobsKeepTheirChunks(self):
+        receipts = [ [ ("write", "Receipt %d\n" % i), ("printLine",), ("printBarcode", "1234", "itf"), ("lineFeedCut",) ]
+            for i in range(3) ]
+        with RenderFarm(processes=1) as farm:
+            jobs = farm.compile(receipts)
+            imapped = list(farm.imap(receipts))
+        printer = POSprinter(transport=BufferTransport())
+        for receipt, job, other in zip(receipts, jobs, imapped):
+            with printer.job() as local:
+                for element in receipt:
+                    runElement(printer, element)
+            self.assertTrue(len(job.chunks) > 1)
+            self.assertEqual(job.chunks, local.chunks)
+            self.assertEqual(other.chunks, local.chunks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Lines and their cached printer commands"""
+import unittest
+
+from POSprinter import POSprinter as module
+from POSprinter.POSprinter import POSprinter, RULE_CHARS
+from POSprinter.transport import BufferTransport
+
+
+class LineTest(unittest.TestCase):
+    def setUp(self):
+        module._lineCache.clear()
+        self.printer = POSprinter(transport=BufferTransport())
+
+    def testCachedLineIsUnchanged(self):
+        self.printer.printLine(style="dashed")
+        first = self.printer.printer.reset()
+        # The line as printImgFromPILObject prints its image
+        img = self.printer._lineImage(self.printer.pxWidth * 2, self.printer.pxWidth * 2, 4, 10, 10, "dashed")
+        self.printer.printImgFromPILObject(img)
+        self.assertEqual(first, self.printer.printer.reset())
+        lineImage = self.printer._lineImage
+        def fail(*args):
+            self.fail("The line is drawn again")
+        self.printer._lineImage = fail
+        try:
+            self.printer.printLine(style="dashed")
+        finally:
+            self.printer._lineImage = lineImage
+        self.assertEqual(self.printer.printer.getvalue(), first)
+
+    def testReturnPILObject(self):
+        self.printer.printLine()
+        img = self.printer.printLine(returnPILObject=True, dontPrint=True)
+        self.assertEqual(img.size[0], self.printer.pxWidth * 2)
+
+    def testNative(self):
+        self.printer.printLine(width=0.5, style="double", native=True)
+        rule = RULE_CHARS["double"] * (self.printer.width // 2)
+        self.assertEqual(self.printer.printer.getvalue(), " " * (self.printer.width // 4) + rule + "\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
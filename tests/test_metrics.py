@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Timing of the stages of printing"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.metrics import Metrics
+from POSprinter.transport import BufferTransport
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.printer = POSprinter(transport=BufferTransport())
+        self.printer.metrics = Metrics()
+
+    def testCompiledJobIsTransmittedOnce(self):
+        with self.printer.job() as job:
+            self.printer.write("x" * 99 + "\n")
+        self.printer.send(job)
+        totals = self.printer.metrics.totals
+        self.assertEqual(totals["transmit"][2], 100)
+        self.assertEqual(totals["compile"][2], 100)
+
+    def testQRStage(self):
+        self.printer.printQR("http://www.sman.dk", version=2)
+        self.assertEqual(self.printer.metrics.totals["qr"][0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
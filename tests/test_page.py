@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Composition of text, images and QR codes on a page"""
+import unittest
+
+from PIL import Image, ImageDraw
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.page import Page, PAGE_MODE, PRINT_PAGE
+from POSprinter.transport import BufferTransport
+from POSprinter import virtual
+
+
+class PageTest(unittest.TestCase):
+    def setUp(self):
+        self.printer = POSprinter(transport=BufferTransport(), profile="tm-t88iii")
+        self.page = Page(self.printer, 200)
+
+    def render(self, data):
+        return virtual.render(data, pxWidth=self.printer.pxWidth, charWidth=self.printer.width,
+            motionUnits=self.printer.motionUnits)
+
+    def testPageModeLooksLikeBitmap(self):
+        img = Image.new("1", (100, 50), 1)
+        ImageDraw.Draw(img).ellipse((5, 5, 95, 45), fill=0)
+        self.page.text(0, 0, "Total 12.00")
+        self.page.text(10, 30, u"Caf\xe9")
+        self.page.image(200, 13, img)
+        self.page.qr(320, 0, "http://www.sman.dk", moduleSize=4)
+        pageMode = self.page.pageModeCommands()
+        self.assertTrue(pageMode.startswith(PAGE_MODE) and pageMode.endswith(PRINT_PAGE))
+        with self.printer.redirect(BufferTransport()) as buf:
+            self.printer.printBitmap(self.page.bitmap(), "high", "left")
+        a, b = self.render(pageMode), self.render(buf.getvalue())
+        self.assertEqual(a.size, b.size)
+        self.assertEqual(list(a.getdata()), list(b.getdata()))
+
+    def testUnicodeIsEncoded(self):
+        self.page.text(0, 0, u"Caf\xe9 商")
+        self.assertEqual(self.page.elements, [ (0, 0, "Caf\x82 ??") ])
+
+    def testTextBounds(self):
+        columns = self.printer.width
+        self.page.text(0, 176, "x" * columns)
+        self.assertRaises(ValueError, self.page.text, 0, 0, "x" * (columns + 1))
+        self.assertRaises(ValueError, self.page.text, 0, 177, "x")
+        self.assertRaises(ValueError, self.page.text, 0, 0, u"商" * (columns // 2 + 1))
+        self.assertRaises(ValueError, self.page.text, 0, 0, "two\nlines")
+
+    def testImageBounds(self):
+        self.assertRaises(ValueError, self.page.image, 500, 0, Image.new("1", (20, 20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Encoding and sending at the same time"""
+import unittest
+
+from PIL import Image, ImageDraw
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.pipeline import PipelinedTransport
+from POSprinter.transport import BufferTransport
+
+
+class FakePort(BufferTransport):
+    """A port with flow control, which takes everything at once"""
+    rtscts = True
+
+    def flush(self):
+        pass
+
+
+class BrokenPort(BufferTransport):
+    def write(self, data):
+        raise IOError("unplugged")
+
+
+class PipelineTest(unittest.TestCase):
+    def printReceipt(self, printer):
+        img = Image.new("1", (200, 100), 1)
+        ImageDraw.Draw(img).ellipse((10, 10, 190, 90), fill=0)
+        printer.write("Shop\n")
+        printer.printImgFromPILObject(img)
+        printer.lineFeedCut()
+
+    def testSameOutput(self):
+        direct = POSprinter(transport=BufferTransport())
+        self.printReceipt(direct)
+        printer = POSprinter(transport=BufferTransport())
+        with printer.pipelined(depth=2):
+            self.printReceipt(printer)
+        self.assertEqual(printer.printer.getvalue(), direct.printer.getvalue())
+
+    def testOrder(self):
+        port = BufferTransport()
+        pipeline = PipelinedTransport(port, depth=3)
+        for i in range(1000):
+            pipeline.write("%d," % i)
+        pipeline.close()
+        self.assertEqual(port.getvalue(), "".join([ "%d," % i for i in range(1000) ]))
+        self.assertEqual(pipeline.bytesSent, len(port.getvalue()))
+
+    def testErrorRaisedByNextCall(self):
+        for method in ("write", "flush", "close"):
+            pipeline = PipelinedTransport(BrokenPort())
+            pipeline.write("x")
+            # Wait until the writer thread has tried to write
+            pipeline.queue.join()
+            args = ("y",) if method == "write" else ()
+            self.assertRaises(IOError, getattr(pipeline, method), *args)
+            if method != "close":
+                pipeline.close()
+
+    def testSchedulerFlushed(self):
+        port = FakePort()
+        printer = POSprinter(transport=port)
+        printer.enableScheduler()
+        with printer.pipelined():
+            printer.write("Hello\n")
+        self.assertEqual(port.getvalue(), "Hello\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Choosing the mask of QR codes"""
+import hashlib
+import unittest
+
+from pyqrnative.PyQRNative import QRCode, QRErrorCorrectLevel, QRMaskStrategy, QRUtil
+
+
+def qrCode(version, data):
+    qr = QRCode(version, QRErrorCorrectLevel.M)
+    qr.addData(data)
+    return qr
+
+
+def digest(qr):
+    count = qr.getModuleCount()
+    return hashlib.md5("".join([ "1" if qr.isDark(r, c) else "0" for r in range(count) for c in range(count) ])).hexdigest()
+
+
+class MaskStrategyTest(unittest.TestCase):
+    def testOptimalUnchanged(self):
+        # Mask patterns and modules made by pyqrnative before the mask strategies were added
+        for version, data, pattern, modules in [
+                (1, "A", 4, "ece2cb49610fbc5e2b9b48a170c69190"),
+                (2, "http://www.sman.dk", 6, "977fbb4986c557940d520c20491b4ecf"),
+                (5, "http://www.sman.dk/receipt?id=1234567890", 6, "2d4c5e1945c4dc427b62083ffba9c134") ]:
+            qr = qrCode(version, data)
+            qr.make()
+            self.assertEqual(qr.maskStats["maskPattern"], pattern)
+            self.assertEqual(qr.maskStats["masksScored"], 8)
+            self.assertEqual(digest(qr), modules)
+
+    def testFixedDoesNotScore(self):
+        getLostPoint = QRUtil.getLostPoint
+        def fail(*args):
+            self.fail("A fixed mask is scored")
+        QRUtil.getLostPoint = staticmethod(fail)
+        try:
+            qr = qrCode(2, "http://www.sman.dk")
+            qr.make(QRMaskStrategy.FIXED, maskPattern=3)
+        finally:
+            QRUtil.getLostPoint = staticmethod(getLostPoint)
+        self.assertEqual(qr.maskStats["maskPattern"], 3)
+        self.assertEqual(qr.maskStats["masksScored"], 0)
+        other = qrCode(2, "http://www.sman.dk")
+        other.makeImpl(False, 3)
+        self.assertEqual(digest(qr), digest(other))
+
+    def testHeuristicFallsBackToOptimal(self):
+        # No mask loses less than 0 points, so all are scored and the best is taken
+        for version in (1, 2, 5):
+            optimal = qrCode(version, "Receipt 1")
+            optimal.make()
+            heuristic = qrCode(version, "Receipt 1")
+            heuristic.make(QRMaskStrategy.HEURISTIC, maxLostPoint=0)
+            self.assertEqual(heuristic.maskStats["masksScored"], 8)
+            self.assertEqual(heuristic.maskStats["maskPattern"], optimal.maskStats["maskPattern"])
+            self.assertEqual(digest(heuristic), digest(optimal))
+
+    def testHeuristicDefaultAtVersion1(self):
+        qr = qrCode(1, "A")
+        qr.make(QRMaskStrategy.HEURISTIC)
+        self.assertEqual(qr.maskStats["masksScored"], 8)
+        self.assertEqual(qr.maskStats["maskPattern"], 4)
+
+    def testHeuristicStopsEarly(self):
+        qr = qrCode(10, "A")
+        qr.make(QRMaskStrategy.HEURISTIC)
+        self.assertTrue(qr.maskStats["masksScored"] < 8)
+        self.assertTrue(qr.maskStats["lostPoint"] < QRMaskStrategy.MAX_LOST_POINT * qr.getModuleCount() ** 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
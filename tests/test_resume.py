@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Sending that survives the serial port going away"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.job import Job
+from POSprinter.resume import ResumableSender, INITIALIZE
+from POSprinter.scheduler import STATUS_REQUEST
+from POSprinter.transport import BufferTransport
+
+
+class UnpluggedPort(BufferTransport):
+    """A port that is unplugged in the middle of write number failAt, after half of its data has gone out"""
+    def __init__(self, failAt):
+        BufferTransport.__init__(self)
+        self.failAt = failAt
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        if self.writes == self.failAt:
+            BufferTransport.write(self, data[:len(data) // 2])
+            raise IOError("unplugged")
+        return BufferTransport.write(self, data)
+
+    def open(self):
+        pass
+
+
+class ResumeTest(unittest.TestCase):
+    def testResyncAfterPartialCommand(self):
+        margin = "\x1D\x4C\x10\x00"
+        band = "\x1D\x76\x30\x00\x02\x00\x02\x00" + "\xFF" * 4
+        job = Job()
+        job.write("\x1B\x4A\x18" + margin + band)
+        job.write(band)
+        job.write("\x1D\x4C\x00\x00")
+        port = UnpluggedPort(2)
+        printer = POSprinter(transport=port)
+        sender = ResumableSender(printer, checkpointBytes=1, backoff=0.0)
+        self.assertEqual(sender.send(job), 3)
+        self.assertEqual(sender.reopens, 1)
+        # Half the second band, padding to finish it, ESC @, the margin again and the whole second band
+        expected = (job.chunks[0] + band[:6] + "\x00" * len(band) + INITIALIZE + margin + band + job.chunks[2])
+        self.assertEqual(port.getvalue().replace(STATUS_REQUEST, ""), expected)
+
+    def testNoResyncWithoutFailure(self):
+        port = BufferTransport()
+        sender = ResumableSender(POSprinter(transport=port), checkpointBytes=1)
+        sender.send(Job("Hello\n"))
+        self.assertEqual(port.getvalue().replace(STATUS_REQUEST, ""), "Hello\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Sending through scheduler.SendScheduler"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.transport import BufferTransport
+
+
+class FakePort(BufferTransport):
+    """A port with flow control, which takes everything at once"""
+    rtscts = True
+
+    def writeSizes(self):
+        return [ len(chunk) for chunk in self.chunks ]
+
+    def flush(self):
+        pass
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.port = FakePort()
+        self.printer = POSprinter(transport=self.port)
+        self.scheduler = self.printer.enableScheduler()
+
+    def testCutSendsShortReceipt(self):
+        self.printer.write("Hello\n")
+        self.printer.lineFeedCut()
+        self.assertEqual(self.port.getvalue(), "Hello\n" + "\n" * 6 + "\x1D\x56\x00")
+        self.assertEqual(self.scheduler._batchLen, 0)
+
+    def testSendFlushesJob(self):
+        with self.printer.job() as job:
+            self.printer.write("Hello\n")
+        self.printer.send(job)
+        self.assertEqual(self.port.getvalue(), "Hello\n")
+
+    def testCloseFlushes(self):
+        self.printer.write("Hello\n")
+        self.assertEqual(self.port.getvalue(), "")
+        self.printer.close()
+        self.assertEqual(self.port.getvalue(), "Hello\n")
+
+    def testLargeWritesAreSplit(self):
+        self.printer.printTable([ 4, None ], [ [ i, "Item %d " % i + "x" * 40 ] for i in range(500) ])
+        self.printer.flush()
+        self.assertTrue(max(self.port.writeSizes()) <= self.scheduler.window)
+        self.assertTrue(len(self.port.getvalue()) > 4 * self.scheduler.window)
+
+    def testCommandsAreNotSplit(self):
+        band = "\x1B\x2A\x21\x64\x00" + "\xFF" * 300
+        self.scheduler.maxChunk = 1000
+        self.printer.write("x" * 900 + band + "y" * 50 + "\x1D\x76\x30\x00\x10\x00\x50\x00" + "\x0F" * 1280)
+        self.printer.flush()
+        self.assertEqual(self.port.chunks, [ "x" * 900, band + "y" * 50, "\x1D\x76\x30\x00\x10\x00\x50\x00" + "\x0F" * 1280 ])
+
+
+if __name__ == "__main__":
+    unittest.main()
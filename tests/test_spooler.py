@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""The print spooler"""
+import logging
+import shutil
+import tempfile
+import time
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.resume import INITIALIZE
+from POSprinter.spooler import Spooler
+from POSprinter.scheduler import STATUS_REQUEST
+from POSprinter.transport import BufferTransport
+
+logging.getLogger("POSprinter.spooler").addHandler(logging.NullHandler())
+
+
+class FlakyPort(BufferTransport):
+    """A port that fails the first failures writes, like an unplugged USB serial adapter"""
+    def __init__(self, failures):
+        BufferTransport.__init__(self)
+        self.failures = failures
+        self.opens = 0
+
+    def write(self, data):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("unplugged")
+        return BufferTransport.write(self, data)
+
+    def open(self):
+        self.opens += 1
+
+
+class SpoolerTest(unittest.TestCase):
+    def setUp(self):
+        self.queueDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.queueDir)
+
+    def spool(self, port, jobs, **kwargs):
+        spooler = Spooler(self.queueDir, { "receipt": POSprinter(transport=port) }, **kwargs)
+        ids = [ spooler.submit("receipt", job) for job in jobs ]
+        spooler.start()
+        try:
+            deadline = time.time() + 5
+            while spooler.pending("receipt") and time.time() < deadline:
+                time.sleep(0.01)
+            return ids, spooler.pending("receipt")
+        finally:
+            spooler.stop()
+
+    def testJobsInOrder(self):
+        port = FlakyPort(0)
+        ids, pending = self.spool(port, [ "first\n", "second\n", "third\n" ])
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(pending, [])
+        # The printer does not answer the status request after the first job, so it is only sent once
+        self.assertEqual(port.getvalue().replace(STATUS_REQUEST, ""), "first\nsecond\nthird\n")
+
+    def testJobIsResumedFromCheckpoint(self):
+        # The port fails on the third write of a job of ten image bands; only that checkpoint is sent again
+        band = "\x1B\x2A\x21\x64\x00" + "\xFF" * 300
+        port = FlakyPort(0)
+        writes = []
+        def write(data):
+            writes.append(data)
+            if len(writes) == 3:
+                raise IOError("unplugged")
+            return BufferTransport.write(port, data)
+        port.write = write
+        ids, pending = self.spool(port, [ band * 10 ], retries=1, backoff=0.0, checkpointBytes=600)
+        self.assertEqual(pending, [])
+        # Checkpoints of two bands: two sent, padding for the third and ESC @, then the last three
+        self.assertEqual(port.getvalue().replace(STATUS_REQUEST, ""),
+            band * 4 + "\x00" * len(band) * 2 + INITIALIZE + band * 6)
+
+    def testPortFailureIsRetried(self):
+        port = FlakyPort(3)
+        ids, pending = self.spool(port, [ "first\n", "second\n" ], retryDelay=0.01, retries=1, backoff=0.0)
+        self.assertEqual(pending, [])
+        # The failed writes sent nothing, so the first job follows the padding and ESC @ of the resync
+        self.assertEqual(port.getvalue().replace(STATUS_REQUEST, "").lstrip("\x00"), INITIALIZE + "first\nsecond\n")
+        self.assertTrue(port.opens >= 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Static receipt sections rendered once"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.transport import BufferTransport
+
+
+class StaticTest(unittest.TestCase):
+    def setUp(self):
+        self.renders = 0
+
+    def tearDown(self):
+        POSprinter(transport=BufferTransport()).forgetStatic("header")
+
+    def header(self, printer):
+        self.renders += 1
+        printer.write("The Shop\n", align="center")
+        printer.printLine()
+
+    def printHeader(self, printer):
+        printer.printStatic("header", [ self.header ])
+        return printer.printer.reset()
+
+    def testRenderedOnce(self):
+        printer = POSprinter(transport=BufferTransport())
+        first = self.printHeader(printer)
+        self.assertEqual(self.printHeader(printer), first)
+        self.assertEqual(self.renders, 1)
+        direct = POSprinter(transport=BufferTransport())
+        self.header(direct)
+        self.assertEqual(first, direct.printer.getvalue())
+
+    def testKeptPerWidth(self):
+        self.printHeader(POSprinter(transport=BufferTransport()))
+        narrow = self.printHeader(POSprinter(transport=BufferTransport(), charWidth=32, pxWidth=192))
+        self.assertEqual(self.renders, 2)
+        direct = POSprinter(transport=BufferTransport(), charWidth=32, pxWidth=192)
+        self.header(direct)
+        self.assertEqual(narrow, direct.printer.getvalue())
+
+    def testForget(self):
+        printer = POSprinter(transport=BufferTransport())
+        self.printHeader(printer)
+        printer.forgetStatic("header")
+        self.printHeader(printer)
+        self.assertEqual(self.renders, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Status of the printer, read from a fake printer on a pseudo terminal"""
+import time
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.fake import FakePrinter
+from POSprinter.status import PAPER_STATUS, OFFLINE_STATUS
+
+
+def waitFor(condition, timeout=2.0):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+class StatusTest(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakePrinter()
+        self.printer = POSprinter(port=self.fake.port)
+
+    def tearDown(self):
+        self.printer.close()
+        self.fake.close()
+
+    def testQuery(self):
+        monitor = self.printer.startStatusMonitor()
+        self.assertEqual(monitor.query(PAPER_STATUS), { "paperNearEnd": False, "paperOut": False })
+        self.fake.set(paperOut=True, coverOpen=True)
+        self.assertTrue(monitor.query(PAPER_STATUS)["paperOut"])
+        self.assertTrue(monitor.query(OFFLINE_STATUS)["coverOpen"])
+        self.assertFalse(monitor.isReady())
+
+    def testCallbacks(self):
+        monitor = self.printer.startStatusMonitor(asb=True)
+        events = []
+        monitor.on("paperOut", lambda name, value: events.append((name, value)))
+        self.fake.set(paperOut=True)
+        self.assertTrue(waitFor(lambda: events == [ ("paperOut", True) ]))
+        self.fake.set(paperOut=False)
+        self.assertTrue(waitFor(lambda: events == [ ("paperOut", True), ("paperOut", False) ]))
+
+    def testPollingKeepsSchedulerAcks(self):
+        # The replies to the polls and to the acknowledgements of the scheduler go to the one that asked
+        # The paper status reply of paper out parsed as printer status would set feedButton
+        self.fake.set(paperOut=True)
+        scheduler = self.printer.enableScheduler(chunkSize=64, minChunk=64, maxChunk=64)
+        monitor = self.printer.startStatusMonitor(pollInterval=0.001)
+        wrong = []
+        monitor.on("feedButton", lambda name, value: wrong.append(value))
+        data = "".join([ "line %d\n" % i for i in range(2000) ])
+        for i in range(0, len(data), 100):
+            self.printer.write(data[i:i + 100])
+        self.printer.flush()
+        self.assertTrue(scheduler.useStatus)
+        self.assertEqual(wrong, [])
+        self.assertTrue(monitor.status["paperOut"])
+        self.assertTrue(waitFor(lambda: self.fake.data == data))
+        self.assertEqual(monitor.query(PAPER_STATUS), { "paperNearEnd": False, "paperOut": True })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Streaming of receipts rendered from a template"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.metrics import Metrics
+from POSprinter.stream import Stream
+from POSprinter.table import Column
+from POSprinter.transport import BufferTransport
+
+
+class FakePort(BufferTransport):
+    """A port with flow control, which takes everything at once"""
+    rtscts = True
+
+    def flush(self):
+        pass
+
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.port = FakePort()
+        self.printer = POSprinter(transport=self.port)
+        self.totals = []
+        self.stream = Stream(self.printer, [
+            ("write", "Shop\n", { "align": "center" }),
+            ("rows", [ Column(3, "right"), Column(), Column(6, "right") ]),
+            lambda printer: printer.write("Total %d\n" % sum(self.totals)),
+            ("lineFeedCut",),
+            ], linesPerChunk=2)
+
+    def rows(self, n):
+        for i in range(1, n + 1):
+            self.totals.append(i)
+            yield [ i, "Item %d" % i, "%d.00" % i ]
+
+    def expected(self):
+        printer = POSprinter(transport=BufferTransport())
+        printer.write("Shop\n", align="center")
+        printer.printTable(self.stream.table, [ [ i, "Item %d" % i, "%d.00" % i ] for i in range(1, 6) ])
+        printer.write("Total 15\n")
+        printer.lineFeedCut()
+        return printer.printer.getvalue()
+
+    def testHeaderRowsFooter(self):
+        sent = self.stream.send(self.rows(5))
+        self.assertEqual(self.port.getvalue(), self.expected())
+        self.assertEqual(sent, len(self.port.getvalue()))
+
+    def testScheduler(self):
+        self.printer.enableScheduler()
+        self.printer.metrics = Metrics()
+        sent = self.stream.send(self.rows(5))
+        # Everything, including the cut, has left the scheduler
+        self.assertEqual(self.port.getvalue(), self.expected())
+        self.assertEqual(self.printer.metrics.totals["transmit"][2], sent)
+
+    def testTransport(self):
+        buf = BufferTransport()
+        self.stream.send(self.rows(5), buf)
+        self.assertEqual(buf.getvalue(), self.expected())
+        self.assertEqual(self.port.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
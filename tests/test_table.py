@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Layout of columns of text"""
+import unittest
+
+from POSprinter.POSprinter import POSprinter
+from POSprinter.table import Column, Table, encode
+from POSprinter.transport import BufferTransport
+
+
+class TableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = Table([ Column(4, "right"), Column(), Column(8, "right") ], charWidth=24)
+
+    def testWideCharactersKeepColumnsAligned(self):
+        lines = [ encode(l) for l in self.table.renderRow([ 1, u"商品 Coffee", u"12.50" ]) ]
+        # Each wide character is two "?", so the price stays in the last column
+        self.assertEqual(lines, [ "   1 ???? Coffe    12.50" ])
+
+    def testFormatMatchesLayout(self):
+        # The same row through the format string (str) and the full layout (a wide character)
+        table = Table([ Column(3, "right"), Column(overflow="wrap"), Column(6, "right") ], charWidth=20)
+        self.assertEqual(table.renderRow([ 2, "Espresso", "4.00" ]), [ "  2 Espresso    4.00" ])
+        self.assertEqual(table.renderRow([ 2, u"Espresso doppio grande", "4.00" ]),
+            [ u"  2 Espresso    4.00", u"    doppio", u"    grande" ])
+        self.assertEqual(table.renderRow([ 2, u"Espresso 商", "4.00" ]), [ u"  2 Espresso    4.00", u"    商" ])
+
+    def testNarrowWrapColumn(self):
+        self.assertRaises(ValueError, Table, [ Column(1, overflow="wrap"), Column() ], 10)
+        self.assertRaises(ValueError, Table, [ Column(0, overflow="wrap"), Column() ], 10)
+        self.assertRaises(ValueError, Table, [ Column(8), Column(overflow="wrap") ], 10)
+        table = Table([ Column(2, overflow="wrap"), Column() ], 10)
+        self.assertEqual(table.renderRow([ u"商品x", "y" ]), [ u"商 y", u"品", u"x" ])
+
+    def testPrintTable(self):
+        printer = POSprinter(transport=BufferTransport())
+        printer.printTable([ Column(4), Column() ], [ [ u"商", u"x" ] ])
+        self.assertTrue("??   x\n" in printer.printer.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()